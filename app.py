@@ -1,38 +1,126 @@
-from flask import Flask, render_template
+from flask import Flask, abort, make_response, render_template, request, url_for
+from werkzeug.http import is_resource_modified
 
 from config import Config
-from extensions import db
+from extensions import db, migrate
+from services.page_cache import FilePageStore, PageCache, template_fingerprint
 
 
-def create_app():
+def conditional_response(etag, render):
+    """Answer a GET with an ETag, rendering only when the client is stale.
+
+    `etag` must be computed without rendering; when the request's
+    If-None-Match still matches, a bodyless 304 is returned and `render` is
+    never called. Otherwise `render()` supplies the body bytes.
+
+    No Last-Modified is sent: the ETags cover template deploys and teaser
+    backfills, which no report timestamp reflects.
+    """
+    response = make_response(b"")
+    response.set_etag(etag)
+    if not is_resource_modified(request.environ, etag=etag):
+        response.status_code = 304
+        return response
+    response.set_data(render())
+    return response
+
+
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
     db.init_app(app)
+    migrate.init_app(app, db)
 
     from cli import register_commands
     register_commands(app)
 
-    with app.app_context():
-        db.create_all()
+    # Reports never change once saved, so rendered post pages are cached
+    # by id. The template fingerprint retires old pages after a deploy.
+    store = None
+    if app.config["PAGE_CACHE_DIR"]:
+        store = FilePageStore(app.config["PAGE_CACHE_DIR"], app.config["PAGE_CACHE_MAX_BYTES"])
+    post_cache = PageCache(app.config["PAGE_CACHE_SIZE"], store)
+    post_version = template_fingerprint(app, "base.html", "post.html")
+
+    # Listing pages change only when reports are saved, which bumps the
+    # report generation counter; keying on it retires stale renders at once
+    index_cache = PageCache(app.config["PAGE_CACHE_SIZE"])
+    index_version = template_fingerprint(app, "base.html", "index.html")
+    about_version = template_fingerprint(app, "base.html", "about.html")
 
     @app.route("/")
     def index():
-        from models import Report
+        from models import Report, SiteState, decode_cursor
+
+        cursor = request.args.get("before")
+        if cursor is not None:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                abort(400)
+        generation = SiteState.get_value(SiteState.REPORT_GENERATION)
+        # Each cursor is its own URL, so the ETag only has to cover what
+        # every listing page depends on
+        version = f"index-{generation}-{index_version}"
+
+        def render():
+            key = f"{version}:{cursor or ''}"
+            body = index_cache.get(key)
+            if body is None:
+                reports, next_cursor = Report.listing_page(
+                    cursor=cursor, per_page=app.config["REPORTS_PER_PAGE"]
+                )
+                next_url = url_for("index", before=next_cursor) if next_cursor else None
+                newest_url = url_for("index") if cursor else None
+                body = render_template(
+                    "index.html",
+                    reports=reports,
+                    next_url=next_url,
+                    newest_url=newest_url,
+                ).encode("utf-8")
+                index_cache.put(key, body)
+            return body
 
-        reports = Report.query.order_by(Report.created_at.desc()).all()
-        return render_template("index.html", reports=reports)
+        return conditional_response(version, render)
 
     @app.route("/post/<int:report_id>")
     def post(report_id):
         from models import Report
 
-        report = Report.query.get_or_404(report_id)
-        return render_template("post.html", report=report)
+        # A cached page proves the report exists, so repeat views (and
+        # their revalidations) never touch the database; on a miss only an
+        # id lookup runs before the ETag check
+        key = f"post-{report_id}-{post_version}"
+        cached = post_cache.get(key)
+        if cached is None:
+            exists = db.session.query(Report.id).filter_by(id=report_id).scalar()
+            if exists is None:
+                abort(404)
+
+        def render():
+            if cached is not None:
+                return cached
+            report = Report.query.options(
+                db.undefer(Report.summary), db.undefer(Report.ideas)
+            ).get_or_404(report_id)
+            body = render_template("post.html", report=report).encode("utf-8")
+            post_cache.put(key, body)
+            return body
+
+        response = conditional_response(key, render)
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config["POST_MAX_AGE"]
+        return response
 
     @app.route("/about")
     def about():
-        return render_template("about.html")
+        return conditional_response(
+            f"about-{about_version}",
+            lambda: render_template("about.html").encode("utf-8"),
+        )
 
     return app
 
@@ -0,0 +1,162 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_README_PATH_RE = re.compile(r"^(?:/datasets)?/(.+)/resolve/([^/]+)/README\.md$")
+
+README_SECTION = """## {heading}
+
+This section describes the {heading} of the project in a few sentences of
+plain prose, with a [link](https://example.com) and some `inline code`.
+
+| metric | value |
+|--------|-------|
+| score  | 42.0  |
+
+```python
+from transformers import AutoModel
+model = AutoModel.from_pretrained("org/name")
+```
+
+"""
+README_HEADINGS = (
+    "Model Details", "Intended Uses", "How to Use", "Training Data",
+    "Evaluation", "Limitations", "Citation", "License",
+)
+
+
+def make_readme(target_chars):
+    """Build a model-card-like README of roughly `target_chars` characters."""
+    parts = ["---\nlicense: apache-2.0\n---\n\n# Example\n\nA short description.\n\n"]
+    size = len(parts[0])
+    i = 0
+    while size < target_chars:
+        section = README_SECTION.format(heading=README_HEADINGS[i % len(README_HEADINGS)])
+        parts.append(section)
+        size += len(section)
+        i += 1
+    return "".join(parts)[:target_chars]
+
+
+class FakeHub:
+    """Local stand-in for the parts of the HuggingFace Hub the app uses.
+
+    Serves trending listings for /api/models and /api/datasets with Link
+    header pagination, and README.md files with HEAD, Range requests and
+    an X-Repo-Commit header, the way huggingface_hub expects.
+
+    Args:
+        items: Number of items in each listing.
+        readme_chars: Size of every README.
+        latency: Seconds added before every response.
+    """
+
+    def __init__(self, items=200, readme_chars=30000, latency=0.0):
+        self.items = items
+        self.readme = make_readme(readme_chars).encode("utf-8")
+        self.latency = latency
+        self.requests = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def listing(self, kind, offset, limit):
+        prefix = "m" if kind == "models" else "d"
+        return [
+            {
+                "id": f"{prefix}org/{kind}-{i}",
+                "author": f"{prefix}org",
+                "likes": 1000 - i,
+                "downloads": 100000 - i,
+                "trendingScore": self.items - i,
+                "tags": ["text-generation", "license:apache-2.0"],
+                "createdAt": "2024-01-01T00:00:00.000Z",
+                "pipeline_tag": "text-generation",
+                "library_name": "transformers",
+            }
+            for i in range(offset, min(offset + limit, self.items))
+        ]
+
+    def _handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _delay(self):
+                hub.requests += 1
+                if hub.latency:
+                    time.sleep(hub.latency)
+
+            def _send(self, status, body=b"", headers=None, include_body=True):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if include_body:
+                    self.wfile.write(body)
+
+            def _readme(self, include_body):
+                if not _README_PATH_RE.match(urlparse(self.path).path):
+                    self._send(404, include_body=include_body)
+                    return
+                data = hub.readme
+                status = 200
+                headers = {
+                    "X-Repo-Commit": "0123456789abcdef0123456789abcdef01234567",
+                    "ETag": '"bench-readme"',
+                    "Content-Type": "text/plain; charset=utf-8",
+                }
+                byte_range = self.headers.get("Range")
+                if byte_range and include_body:
+                    start, _, end = byte_range.split("=", 1)[1].partition("-")
+                    end = int(end) if end else len(data) - 1
+                    headers["Content-Range"] = f"bytes {start}-{min(end, len(data) - 1)}/{len(data)}"
+                    data = data[int(start):end + 1]
+                    status = 206
+                self._send(status, data, headers, include_body)
+
+            def do_HEAD(self):
+                self._delay()
+                self._readme(include_body=False)
+
+            def do_GET(self):
+                self._delay()
+                url = urlparse(self.path)
+                if not url.path.startswith("/api/"):
+                    self._readme(include_body=True)
+                    return
+
+                kind = url.path.split("/")[2]
+                query = parse_qs(url.query)
+                limit = int(query.get("limit", ["20"])[0])
+                offset = int(query.get("offset", ["0"])[0])
+                headers = {"Content-Type": "application/json"}
+                if offset + limit < hub.items:
+                    headers["Link"] = (
+                        f"<{hub.url}{url.path}?sort=trendingScore&direction=-1"
+                        f"&limit={limit}&offset={offset + limit}>; rel=\"next\""
+                    )
+                body = json.dumps(hub.listing(kind, offset, limit)).encode("utf-8")
+                self._send(200, body, headers)
+
+        return Handler
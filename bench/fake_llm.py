@@ -0,0 +1,160 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORT = {
+    "title": "Example Model Brings Fast Text Generation to Small GPUs",
+    "summary": (
+        "Example Model is a compact text generation model tuned for instruction "
+        "following. It targets consumer hardware and ships with an Apache-2.0 "
+        "license.\n\nThe card documents training data, intended uses and known "
+        "limitations, making it a practical starting point for local assistants."
+    ),
+    "ideas": [
+        "Build a local meeting-notes summarizer",
+        "Fine-tune it as a support-ticket triage bot",
+        "Use it to draft commit messages from diffs",
+        "Create a privacy-preserving journaling assistant",
+        "Benchmark it against larger models on domain Q&A",
+    ],
+}
+
+# Chars per streamed token, matching the app's own estimate
+CHARS_PER_TOKEN = 4
+
+
+class FakeLLM:
+    """Local OpenAI-compatible chat completions server that mimics Ollama.
+
+    Produces a fixed valid report at `token_rate` tokens per second, either
+    streamed as SSE chunks (with a final usage chunk when requested) or as a
+    single response. With probability `malformed_rate` a response is broken
+    instead: cut off mid-object or wrapped in prose, the failure modes the
+    app's repair and retry paths handle. /api/chat answers the warm-up.
+
+    Args:
+        token_rate: Generated tokens per second; 0 means no delay.
+        malformed_rate: Probability in [0, 1] of a malformed response.
+        prefill_delay: Seconds before the first token.
+        seed: Seed for the malformed-output draw, for reproducible runs.
+    """
+
+    def __init__(self, token_rate=0.0, malformed_rate=0.0, prefill_delay=0.0, seed=0):
+        self.token_rate = token_rate
+        self.malformed_rate = malformed_rate
+        self.prefill_delay = prefill_delay
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def completion_text(self):
+        with self._lock:
+            self.requests += 1
+            malformed = self._random.random() < self.malformed_rate
+            truncate = self._random.random() < 0.5
+        text = json.dumps(REPORT, indent=2)
+        if not malformed:
+            return text
+        if truncate:
+            return text[:len(text) // 2]
+        return "Sure! Here is the report you asked for:\n" + text + "\nLet me know!"
+
+    def _token_delay(self):
+        return 1.0 / self.token_rate if self.token_rate else 0.0
+
+    def _handler(self):
+        llm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.rstrip("/").endswith("/api/chat"):
+                    time.sleep(llm.prefill_delay)
+                    self._send_json({"model": request.get("model"), "done": True})
+                    return
+
+                text = llm.completion_text()
+                prompt_chars = sum(len(m.get("content") or "") for m in request["messages"])
+                usage = {
+                    "prompt_tokens": prompt_chars // CHARS_PER_TOKEN,
+                    "completion_tokens": len(text) // CHARS_PER_TOKEN,
+                    "total_tokens": (prompt_chars + len(text)) // CHARS_PER_TOKEN,
+                }
+                time.sleep(llm.prefill_delay)
+                if request.get("stream"):
+                    include_usage = (request.get("stream_options") or {}).get("include_usage")
+                    self._stream(text, usage if include_usage else None)
+                    return
+
+                time.sleep(llm._token_delay() * usage["completion_tokens"])
+                self._send_json({
+                    "id": "bench", "object": "chat.completion", "created": 0,
+                    "model": request.get("model"),
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": text},
+                    }],
+                    "usage": usage,
+                })
+
+            def _stream(self, text, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                delay = llm._token_delay()
+                try:
+                    for i in range(0, len(text), CHARS_PER_TOKEN):
+                        self._event({
+                            "choices": [{
+                                "index": 0, "finish_reason": None,
+                                "delta": {"content": text[i:i + CHARS_PER_TOKEN]},
+                            }],
+                        })
+                        if delay:
+                            time.sleep(delay)
+                    self._event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                    if usage:
+                        self._event({"choices": [], "usage": usage})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled the stream
+
+            def _event(self, payload):
+                chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0,
+                         "model": "bench", **payload}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
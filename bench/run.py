@@ -0,0 +1,165 @@
+"""Offline benchmarks for the report pipeline and the web routes.
+
+Starts a fake HuggingFace Hub and a fake OpenAI-compatible LLM server on
+localhost, points the app at them and at a throwaway SQLite database, and
+times fetch_trending_item, fetch_readme, generate_report and the Flask
+routes. Nothing touches the network, so runs are reproducible.
+
+Usage:
+    python -m bench.run [--iterations 20] [--hub-latency-ms 50]
+                        [--token-rate 40] [--malformed 0.1] [--only llm]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from bench.fake_hub import FakeHub
+from bench.fake_llm import FakeLLM
+from services.loadtest import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", "-n", type=int, default=10,
+                        help="Timed runs per benchmark (after one untimed warm-up run).")
+    parser.add_argument("--hub-latency-ms", type=float, default=0.0,
+                        help="Latency added to every fake Hub response.")
+    parser.add_argument("--readme-chars", type=int, default=30000,
+                        help="Size of the READMEs served by the fake Hub.")
+    parser.add_argument("--token-rate", type=float, default=0.0,
+                        help="Fake LLM generation speed in tokens/s (0 = instant).")
+    parser.add_argument("--prefill-ms", type=float, default=0.0,
+                        help="Fake LLM delay before the first token.")
+    parser.add_argument("--malformed", type=float, default=0.0,
+                        help="Probability that a fake LLM response is malformed.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the malformed-output draw.")
+    parser.add_argument("--reports", type=int, default=200,
+                        help="Reports seeded into the database for the route benchmarks.")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Run only benchmarks whose name contains this (repeatable).")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Show the app's own logging.")
+    return parser.parse_args(argv)
+
+
+def measure(fn, iterations):
+    """Run fn once untimed, then `iterations` times; return (ms list, errors)."""
+    try:
+        fn()
+    except Exception:
+        pass
+    timings = []
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            errors += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, errors
+
+
+def build_benchmarks(args, workdir):
+    # The app modules read HF_ENDPOINT and DATABASE_URL at import time, so
+    # they are imported only once the environment points at the fakes
+    from flask_migrate import upgrade
+
+    from app import create_app
+    from cli import seed_reports
+    from services.huggingface import fetch_readme, fetch_trending_item
+    from services.llm import generate_report
+    from services.readme_cache import ReadmeCache
+
+    app = create_app()
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+        report_ids = seed_reports(args.reports)
+    client = app.test_client()
+
+    cache = ReadmeCache(os.path.join(workdir, "readmes"), 50 * 1024 * 1024)
+    readme = fetch_readme("morg/models-0", "model")
+    metadata = {
+        "id": "morg/models-0", "type": "model", "likes": 1000, "downloads": 100000,
+        "tags": ["text-generation"], "readme": readme,
+    }
+    llm_settings = {
+        "ollama_url": os.environ["OLLAMA_URL"], "api_key": "bench", "model": "bench",
+    }
+
+    def get(path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+
+    middle_id = report_ids[len(report_ids) // 2]
+    return [
+        ("hf.fetch_trending_item", lambda: fetch_trending_item()),
+        ("hf.fetch_readme", lambda: fetch_readme("morg/models-1", "model")),
+        ("hf.fetch_readme (cached)",
+         lambda: fetch_readme("morg/models-1", "model", cache=cache)),
+        ("llm.generate_report",
+         lambda: generate_report(metadata=metadata, **llm_settings)),
+        ("llm.generate_report (stream)",
+         lambda: generate_report(metadata=metadata, stream=True, **llm_settings)),
+        ("web GET /", lambda: get("/")),
+        ("web GET /post/<id>", lambda: get(f"/post/{middle_id}")),
+        ("web GET /about", lambda: get("/about")),
+    ]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format="%(name)s: %(message)s",
+    )
+
+    hub = FakeHub(readme_chars=args.readme_chars, latency=args.hub_latency_ms / 1000).start()
+    llm = FakeLLM(
+        token_rate=args.token_rate, malformed_rate=args.malformed,
+        prefill_delay=args.prefill_ms / 1000, seed=args.seed,
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="hf-bench-")
+    os.environ.update(
+        HF_ENDPOINT=hub.url,
+        HF_HUB_DISABLE_TELEMETRY="1",
+        OLLAMA_URL=llm.url,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        README_CACHE_DIR=os.path.join(workdir, "readmes"),
+    )
+
+    try:
+        benchmarks = build_benchmarks(args, workdir)
+        if args.only:
+            benchmarks = [
+                (name, fn) for name, fn in benchmarks
+                if any(key in name for key in args.only)
+            ]
+
+        print(f"{'benchmark':<30} {'n':>4} {'err':>4} {'mean ms':>9} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        print("-" * 80)
+        for name, fn in benchmarks:
+            timings, errors = measure(fn, args.iterations)
+            print(
+                f"{name:<30} {len(timings):>4} {errors:>4} "
+                f"{sum(timings) / len(timings):>9.1f} {percentile(timings, 50):>9.1f} "
+                f"{percentile(timings, 95):>9.1f} {max(timings):>9.1f}"
+            )
+        print("-" * 80)
+        print(f"fake hub requests: {hub.requests}, fake LLM completions: {llm.requests}")
+    finally:
+        hub.stop()
+        llm.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
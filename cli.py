@@ -1,84 +1,492 @@
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import random
+import socket
+import subprocess
 import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
 
 import click
-from flask import current_app
+from flask import current_app, render_template
 from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
 
 from extensions import db
-from models import Report
-from services.huggingface import fetch_trending_item, fetch_readme
-from services.llm import generate_report
+from models import TEASER_LENGTH, Report, SiteState
+from services.pipeline import GenerationPipeline
+from services.loadtest import child_pids, process_memory, run_load, wait_until_ready
+from services.page_cache import template_fingerprint
+from services.readme_cache import ReadmeCache
+from services.static_export import StaticSite
+from services.timing import collect, span
 
 logger = logging.getLogger(__name__)
 
 
+def get_readme_cache():
+    """Build the README cache from config, or None if it is disabled."""
+    directory = current_app.config.get("README_CACHE_DIR")
+    if not directory:
+        return None
+    return ReadmeCache(directory, current_app.config["README_CACHE_MAX_BYTES"])
+
+
+def llm_settings():
+    """generate_report keyword arguments taken from config."""
+    config = current_app.config
+    return {
+        "ollama_url": config["OLLAMA_URL"],
+        "api_key": config["OLLAMA_API_KEY"],
+        "model": config["OLLAMA_MODEL"],
+        "readme_token_budget": config["README_TOKEN_BUDGET"],
+        "timeout": config["OLLAMA_TIMEOUT"],
+        "connect_timeout": config["OLLAMA_CONNECT_TIMEOUT"],
+        "stream": config["OLLAMA_STREAM"],
+        "json_mode": config["OLLAMA_JSON_MODE"],
+        "keep_alive": config["OLLAMA_KEEP_ALIVE"],
+    }
+
+
+def save_reports(reports):
+    """Insert reports in a single transaction, skipping already-reported items.
+
+    Items are checked against the database again right before the insert,
+    because a backfill selects its items minutes earlier and another job may
+    have saved one of them since. If the unique (item_name, item_type)
+    index still rejects the batch, each report is retried on its own so one
+    conflict cannot discard the rest.
+
+    The report generation counter is bumped in the same transaction, so
+    cached homepage renders are retired exactly when the reports land.
+
+    Returns:
+        The reports that were saved.
+    """
+    used = Report.used_item_names(r.item_name for r in reports)
+    if used:
+        fresh = [r for r in reports if r.item_name not in used]
+        _log_skipped(reports, fresh)
+        reports = fresh
+    if not reports:
+        return []
+
+    try:
+        with span("db.commit", reports=len(reports)):
+            db.session.add_all(reports)
+            SiteState.bump(SiteState.REPORT_GENERATION)
+            db.session.commit()
+        return reports
+    except IntegrityError:
+        db.session.rollback()
+
+    saved = []
+    for report in reports:
+        try:
+            with db.session.begin_nested():
+                db.session.add(report)
+        except IntegrityError:
+            continue
+        saved.append(report)
+    _log_skipped(reports, saved)
+    if saved:
+        SiteState.bump(SiteState.REPORT_GENERATION)
+    db.session.commit()
+    return saved
+
+
+def _log_skipped(reports, kept):
+    kept = {id(r) for r in kept}
+    for report in reports:
+        if id(report) not in kept:
+            logger.warning(
+                "Skipping %s (%s): a report for it was saved concurrently",
+                report.item_name, report.item_type,
+            )
+
+
+SYNTHETIC_WORDS = (
+    "model", "dataset", "training", "tokens", "benchmark", "instruction",
+    "multilingual", "open", "weights", "context", "fine-tuned", "license",
+    "inference", "quantized", "evaluation", "reasoning", "vision", "audio",
+    "retrieval", "agents", "efficient", "parameters", "community", "release",
+)
+
+
+def _synthetic_text(rng, words):
+    return " ".join(rng.choice(SYNTHETIC_WORDS) for _ in range(words))
+
+
+def seed_reports(count, seed=0):
+    """Insert synthetic reports until the database holds at least `count`.
+
+    Sizes follow real reports: a two-paragraph summary, five ideas and
+    metadata that includes a README of roughly 15k characters. Existing
+    reports are kept, so a seeded database can be reused across runs.
+
+    Returns:
+        The ids of all reports in the database.
+    """
+    rng = random.Random(seed)
+    existing = db.session.query(db.func.count(Report.id)).scalar()
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = []
+    for i in range(existing, count):
+        summary = f"{_synthetic_text(rng, 110)}.\n\n{_synthetic_text(rng, 90)}."
+        metadata = {
+            "id": f"synthetic/item-{i}",
+            "type": "model" if i % 2 else "dataset",
+            "author": "synthetic",
+            "likes": rng.randint(0, 5000),
+            "downloads": rng.randint(0, 10 ** 6),
+            "tags": rng.sample(SYNTHETIC_WORDS, 10),
+            "readme": _synthetic_text(rng, 1800),
+        }
+        report = Report.from_generation(metadata, {
+            "title": _synthetic_text(rng, 8).title(),
+            "summary": summary,
+            "ideas": [_synthetic_text(rng, 14) for _ in range(5)],
+        })
+        report.created_at = base + timedelta(hours=i)
+        batch.append(report)
+        if len(batch) == 500:
+            db.session.add_all(batch)
+            db.session.commit()
+            batch = []
+    db.session.add_all(batch)
+    SiteState.bump(SiteState.REPORT_GENERATION)
+    db.session.commit()
+    return [row.id for row in db.session.query(Report.id)]
+
+
+def echo_timings(collector):
+    """Print the per-stage timing summary of a job."""
+    click.echo("\n=== Stage Timings ===")
+    click.echo(collector.summary())
+
+
+# Reports rendered per query when exporting posts
+EXPORT_BATCH_SIZE = 200
+
+
+def export_site(directory, force=False):
+    """Render the whole site into `directory` as static files.
+
+    Pages map to paths a static server can answer for the site's URLs:
+    `/` is index.html, `/post/<id>` is post/<id>.html, `/about` is
+    about.html and older listing pages are page/<n>.html. Posts never
+    change once saved, so only new ones are rendered unless a template
+    changed; listing pages are re-rendered when the report generation
+    counter moves.
+
+    Returns:
+        The StaticSite, for its written/skipped counts, and the number of
+        files removed.
+    """
+    app = current_app
+    site = StaticSite(directory, force=force)
+    per_page = app.config["REPORTS_PER_PAGE"]
+
+    with app.test_request_context("/"):
+        generation = SiteState.get_value(SiteState.REPORT_GENERATION)
+        total = db.session.query(db.func.count(Report.id)).scalar()
+        pages = max(1, -(-total // per_page))
+        listing_version = f"{generation}-{template_fingerprint(app, 'base.html', 'index.html')}"
+        paths = ["index.html"] + [f"page/{n}.html" for n in range(2, pages + 1)]
+        stale = [path for path in paths if not site.is_current(path, listing_version)]
+        if stale:
+            # Keyset pagination has to walk every page from the newest
+            cursor = None
+            for n, path in enumerate(paths, start=1):
+                reports, cursor = Report.listing_page(cursor=cursor, per_page=per_page)
+                if path not in stale:
+                    continue
+                body = render_template(
+                    "index.html",
+                    reports=reports,
+                    next_url=f"/page/{n + 1}" if cursor else None,
+                    newest_url="/" if n > 1 else None,
+                )
+                site.write(path, body.encode("utf-8"), listing_version)
+
+        post_version = template_fingerprint(app, "base.html", "post.html")
+        ids = [row.id for row in db.session.query(Report.id).order_by(Report.id)]
+        stale_ids = [i for i in ids if not site.is_current(f"post/{i}.html", post_version)]
+        for start in range(0, len(stale_ids), EXPORT_BATCH_SIZE):
+            batch = stale_ids[start:start + EXPORT_BATCH_SIZE]
+            reports = Report.query.options(
+                db.undefer(Report.summary), db.undefer(Report.ideas)
+            ).filter(Report.id.in_(batch))
+            for report in reports:
+                body = render_template("post.html", report=report)
+                site.write(f"post/{report.id}.html", body.encode("utf-8"), post_version)
+
+        about_version = template_fingerprint(app, "base.html", "about.html")
+        if not site.is_current("about.html", about_version):
+            site.write("about.html", render_template("about.html").encode("utf-8"), about_version)
+
+    for root, _, names in os.walk(app.static_folder):
+        for name in sorted(names):
+            source = os.path.join(root, name)
+            path = os.path.join(
+                "static", os.path.relpath(source, app.static_folder)
+            ).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                body = f.read()
+            version = hashlib.sha256(body).hexdigest()[:12]
+            if not site.is_current(path, version):
+                site.write(path, body, version)
+
+    return site, site.finish()
+
+
 def register_commands(app):
     @app.cli.command("generate-report")
+    @click.option("--timings", is_flag=True,
+                  help="Print a per-stage timing summary at the end.")
     @with_appcontext
-    def generate_report_command():
+    def generate_report_command(timings):
         """Fetch a trending HF item and generate a daily report."""
         # Enable logging so LLM output is visible in the console
         logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
 
-        try:
-            # Get already-used item names to avoid duplicates
-            used_names = {
-                r.item_name for r in db.session.query(Report.item_name).all()
-            }
-
-            click.echo("Fetching trending item from HuggingFace...")
-            metadata = fetch_trending_item(
-                token=current_app.config.get("HUGGINGFACE_TOKEN"),
-                used_names=used_names,
-            )
-            click.echo(f"Selected: {metadata['id']} ({metadata['type']})")
-
-            # Fetch the README for this specific repo
-            click.echo(f"Fetching README for {metadata['id']}...")
-            readme = fetch_readme(
-                repo_id=metadata["id"],
-                item_type=metadata["type"],
-                token=current_app.config.get("HUGGINGFACE_TOKEN"),
-            )
-            if readme:
-                metadata["readme"] = readme
-                click.echo(f"README fetched ({len(readme)} chars)")
-            else:
-                click.echo("README not available, continuing with metadata only")
+        pipeline = GenerationPipeline(
+            llm_settings(),
+            token=current_app.config.get("HUGGINGFACE_TOKEN"),
+            readme_cache=get_readme_cache(),
+            # Only the candidate pool is checked against the database
+            filter_used=Report.used_item_names,
+            warm_up=current_app.config["OLLAMA_WARMUP"],
+        )
 
-            click.echo("=== Metadata sent to LLM ===")
-            click.echo(json.dumps(metadata, indent=2, default=str))
+        # Every stage logs a JSON timing span; the collector gathers them
+        # for the optional summary
+        with collect() as collector:
+            try:
+                with span("job.generate_report"):
+                    # Selection, README prefetch for the top candidates and
+                    # the LLM warm-up all run concurrently before the report
+                    # request
+                    click.echo("Fetching trending item and README from HuggingFace...")
+                    metadata, result, metrics = asyncio.run(
+                        pipeline.run_one(prefetch=current_app.config["README_PREFETCH"])
+                    )
+                    click.echo(f"Selected: {metadata['id']} ({metadata['type']})")
+                    if "readme" in metadata:
+                        click.echo(f"README fetched ({len(metadata['readme'])} chars)")
+                    else:
+                        click.echo("README not available, continuing with metadata only")
 
-            click.echo("Generating report via LLM...")
-            result = generate_report(
-                metadata=metadata,
-                ollama_url=current_app.config["OLLAMA_URL"],
-                api_key=current_app.config["OLLAMA_API_KEY"],
-                model=current_app.config["OLLAMA_MODEL"],
-            )
+                    click.echo("=== Metadata sent to LLM ===")
+                    click.echo(json.dumps(metadata, indent=2, default=str))
+
+                    click.echo("=== Final Report ===")
+                    click.echo(f"Title: {result['title']}")
+                    click.echo(f"Summary: {result['summary'][:200]}...")
+                    click.echo("Ideas:")
+                    for i, idea in enumerate(result["ideas"], 1):
+                        click.echo(f"  {i}. {idea}")
+
+                    report = Report.from_generation(metadata, result, metrics)
+                    if not save_reports([report]):
+                        raise RuntimeError(
+                            f"A report for {metadata['id']} was saved concurrently"
+                        )
+
+                    click.echo(f"\nReport saved: {report.title} (ID: {report.id})")
+
+            except Exception as e:
+                click.echo(f"Error generating report: {e}", err=True)
+                if timings:
+                    echo_timings(collector)
+                sys.exit(1)
+
+        if timings:
+            echo_timings(collector)
+
+    @app.cli.command("backfill")
+    @click.option("--count", "-n", type=click.IntRange(min=1), default=7,
+                  show_default=True, help="Number of reports to generate.")
+    @click.option("--concurrency", "-k", type=click.IntRange(min=1), default=2,
+                  show_default=True, help="Maximum LLM generations in flight.")
+    @click.option("--timings", is_flag=True,
+                  help="Print a per-stage timing summary at the end.")
+    @with_appcontext
+    def backfill_command(count, concurrency, timings):
+        """Generate reports for several unused trending items in one run."""
+        logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+        saved = []
+        pipeline = GenerationPipeline(
+            llm_settings(),
+            token=current_app.config.get("HUGGINGFACE_TOKEN"),
+            readme_cache=get_readme_cache(),
+            filter_used=Report.used_item_names,
+            # Insert in trending order so report ids follow the ranking
+            save=lambda results: saved.extend(save_reports(
+                [Report.from_generation(*result) for result in results]
+            )),
+            concurrency=concurrency,
+            warm_up=current_app.config["OLLAMA_WARMUP"],
+        )
+
+        with collect() as collector:
+            try:
+                with span("job.backfill", count=count, concurrency=concurrency):
+                    click.echo(f"Generating up to {count} reports, {concurrency} at a time...")
+                    results = asyncio.run(pipeline.run(count))
+                    for metadata, report, _ in results:
+                        click.echo(f"Generated: {report['title']} ({metadata['id']})")
+                    click.echo(f"\nSaved {len(saved)} report(s)")
+
+            except Exception as e:
+                click.echo(f"Error running backfill: {e}", err=True)
+                if timings:
+                    echo_timings(collector)
+                sys.exit(1)
 
-            click.echo("=== Final Report ===")
-            click.echo(f"Title: {result['title']}")
-            click.echo(f"Summary: {result['summary'][:200]}...")
-            click.echo("Ideas:")
-            for i, idea in enumerate(result["ideas"], 1):
-                click.echo(f"  {i}. {idea}")
-
-            report = Report(
-                title=result["title"],
-                item_name=metadata["id"],
-                item_type=metadata["type"],
-                summary=result["summary"],
-                ideas=json.dumps(result["ideas"]),
-                metadata_json=json.dumps(metadata, default=str),
+        if timings:
+            echo_timings(collector)
+
+    @app.cli.command("backfill-teasers")
+    @with_appcontext
+    def backfill_teasers_command():
+        """Fill the teaser column for reports that predate it."""
+        # A single UPDATE keeps the summaries inside the database
+        result = db.session.execute(
+            db.update(Report)
+            .where(Report.teaser.is_(None))
+            .values(teaser=db.func.substr(Report.summary, 1, TEASER_LENGTH))
+        )
+        SiteState.bump(SiteState.REPORT_GENERATION)
+        db.session.commit()
+        click.echo(f"Backfilled teasers for {result.rowcount} report(s)")
+
+    @app.cli.command("export-static")
+    @click.option("--output", "-o", type=click.Path(file_okay=False), default="site",
+                  show_default=True, help="Directory to write the site to.")
+    @click.option("--force", is_flag=True,
+                  help="Re-render every page, ignoring the previous export.")
+    @with_appcontext
+    def export_static_command(output, force):
+        """Render the site to static files, re-rendering only what changed."""
+        site, removed = export_site(output, force=force)
+        click.echo(
+            f"Exported to {output}: {site.written} file(s) written, "
+            f"{site.skipped} unchanged, {removed} removed"
+        )
+
+    @app.cli.command("loadtest")
+    @click.option("--reports", "-n", type=click.IntRange(min=1), default=1000,
+                  show_default=True, help="Synthetic reports to seed.")
+    @click.option("--concurrency", "-c", type=click.IntRange(min=1), default=8,
+                  show_default=True, help="Concurrent HTTP clients.")
+    @click.option("--duration", "-d", type=click.FloatRange(min=1), default=10.0,
+                  show_default=True, help="Seconds of measured load.")
+    @click.option("--warmup", type=click.FloatRange(min=0), default=2.0,
+                  show_default=True, help="Seconds of unmeasured load first.")
+    @click.option("--workers", "-w", type=click.IntRange(min=1), default=2,
+                  show_default=True, help="Gunicorn worker processes.")
+    @click.option("--threads", type=click.IntRange(min=1), default=1,
+                  show_default=True, help="Threads per gunicorn worker.")
+    @click.option("--database-url", default=None,
+                  help="Scratch database to seed and serve (default: a temporary "
+                       "SQLite file). Never point this at production.")
+    @with_appcontext
+    def loadtest_command(reports, concurrency, duration, warmup, workers, threads,
+                         database_url):
+        """Load-test the web routes under gunicorn against seeded data."""
+        from flask_migrate import upgrade
+
+        from app import create_app
+
+        root = current_app.root_path
+        with tempfile.TemporaryDirectory(prefix="hf-loadtest-") as workdir:
+            url = database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+            target = create_app({"SQLALCHEMY_DATABASE_URI": url})
+            with target.app_context():
+                upgrade(directory=os.path.join(root, "migrations"))
+                click.echo(f"Seeding up to {reports} reports...")
+                post_ids = seed_reports(reports)
+
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "gunicorn",
+                    "--workers", str(workers), "--threads", str(threads),
+                    "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+                    "app:app",
+                ],
+                cwd=root,
+                env={**os.environ, "DATABASE_URL": url},
             )
-            db.session.add(report)
-            db.session.commit()
+            try:
+                wait_until_ready("127.0.0.1", port)
+                click.echo(
+                    f"Serving {len(post_ids)} reports with {workers} worker(s) x "
+                    f"{threads} thread(s); {concurrency} clients for {duration:.0f}s..."
+                )
+                if warmup:
+                    run_load("127.0.0.1", port, post_ids, concurrency, warmup)
+                result = run_load("127.0.0.1", port, post_ids, concurrency, duration)
+                memory = [(pid, process_memory(pid)) for pid in child_pids(server.pid)]
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        click.echo()
+        click.echo(result.summary())
+        click.echo(f"\nThroughput: {result.throughput:.1f} req/s over {result.elapsed:.1f}s")
+        click.echo("Worker memory (RSS / peak):")
+        for pid, usage in memory:
+            if usage is None:
+                click.echo(f"  pid {pid}: unavailable")
+            else:
+                click.echo(f"  pid {pid}: {usage[0] / 1024:.1f} MiB / {usage[1] / 1024:.1f} MiB")
+        if not memory:
+            click.echo("  unavailable (needs Linux /proc)")
+
+    @app.cli.group("cache")
+    def cache_group():
+        """Manage the persistent README cache."""
 
-            click.echo(f"\nReport saved: {report.title} (ID: {report.id})")
+    @cache_group.command("info")
+    @with_appcontext
+    def cache_info_command():
+        """Show README cache location and usage."""
+        cache = get_readme_cache()
+        if cache is None:
+            click.echo("README cache is disabled (README_CACHE_DIR is empty)")
+            return
+        count, total = cache.stats()
+        click.echo(f"Directory: {cache.directory}")
+        click.echo(f"Entries: {count}")
+        click.echo(f"Size: {total / 1024:.1f} KiB of {cache.max_bytes / 1024:.1f} KiB")
+
+    @cache_group.command("prune")
+    @click.option("--max-bytes", type=int, default=None,
+                  help="Size to prune down to (defaults to README_CACHE_MAX_BYTES).")
+    @with_appcontext
+    def cache_prune_command(max_bytes):
+        """Evict least recently used README cache entries."""
+        cache = get_readme_cache()
+        if cache is None:
+            click.echo("README cache is disabled (README_CACHE_DIR is empty)")
+            return
+        removed = cache.prune(max_bytes=max_bytes)
+        click.echo(f"Removed {removed} cache entr{'y' if removed == 1 else 'ies'}")
 
-        except Exception as e:
-            click.echo(f"Error generating report: {e}", err=True)
-            sys.exit(1)
+    @cache_group.command("clear")
+    @with_appcontext
+    def cache_clear_command():
+        """Remove every README cache entry."""
+        cache = get_readme_cache()
+        if cache is None:
+            click.echo("README cache is disabled (README_CACHE_DIR is empty)")
+            return
+        removed = cache.clear()
+        click.echo(f"Removed {removed} cache entr{'y' if removed == 1 else 'ies'}")
@@ -13,10 +13,50 @@ class Config:
     SQLALCHEMY_DATABASE_URI = uri
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Number of reports shown per page of the homepage listing
+    REPORTS_PER_PAGE = int(os.environ.get("REPORTS_PER_PAGE", "20"))
+
+    # Rendered post pages kept in each process; 0 disables the in-process cache
+    PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", "256"))
+    # Optional directory shared by all workers for rendered post pages
+    PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", "")
+    PAGE_CACHE_MAX_BYTES = int(
+        os.environ.get("PAGE_CACHE_MAX_BYTES", str(100 * 1024 * 1024))
+    )
+    # Cache-Control max-age (seconds) for post pages, which never change
+    POST_MAX_AGE = int(os.environ.get("POST_MAX_AGE", "86400"))
+
     # Ollama / LLM
     OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
     OLLAMA_API_KEY = os.environ.get("OLLAMA_API_KEY", "ollama")
     OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
+    # Seconds to wait for a completion / for the connection to the server
+    OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "600"))
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "10"))
+    # Stream completions so malformed JSON is cancelled early
+    OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "true").lower() in ("1", "true", "yes")
+    # Structured output: "schema" (JSON schema), "json" (JSON mode) or "off"
+    OLLAMA_JSON_MODE = os.environ.get("OLLAMA_JSON_MODE", "schema")
+    # How long Ollama keeps the model loaded after a request ("30m", "24h",
+    # "-1" for forever); empty uses the server default
+    OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE") or None
+    if OLLAMA_KEEP_ALIVE and OLLAMA_KEEP_ALIVE.lstrip("-").isdigit():
+        OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)  # bare numbers are seconds
+    # Load the model and prefill the system prompt before the report request
+    OLLAMA_WARMUP = os.environ.get("OLLAMA_WARMUP", "true").lower() in ("1", "true", "yes")
+    # Approximate tokens of condensed README included in the prompt
+    README_TOKEN_BUDGET = int(os.environ.get("README_TOKEN_BUDGET", "3000"))
 
     # HuggingFace
     HUGGINGFACE_TOKEN = os.environ.get("HUGGINGFACE_TOKEN", None)
+
+    # Persistent README cache; set README_CACHE_DIR to an empty string to disable
+    README_CACHE_DIR = os.environ.get(
+        "README_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "hf-daily-briefer", "readmes"),
+    )
+    README_CACHE_MAX_BYTES = int(
+        os.environ.get("README_CACHE_MAX_BYTES", str(50 * 1024 * 1024))
+    )
+    # Candidates whose READMEs generate-report downloads in parallel
+    README_PREFETCH = int(os.environ.get("README_PREFETCH", "3"))
@@ -0,0 +1,40 @@
+"""create reports table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by the old db.create_all() call already have the
+    # table; adopt them instead of failing.
+    if sa.inspect(op.get_bind()).has_table('reports'):
+        return
+
+    op.create_table(
+        'reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('item_name', sa.String(length=500), nullable=False),
+        sa.Column('item_type', sa.String(length=10), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('ideas', sa.Text(), nullable=False),
+        sa.Column('metadata', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade():
+    op.drop_table('reports')
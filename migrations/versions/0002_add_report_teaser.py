@@ -0,0 +1,33 @@
+"""add report teaser column
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The column may already exist if `flask backfill-teasers` added it
+    # before migrations were introduced.
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('reports')}
+    if 'teaser' not in columns:
+        op.add_column('reports', sa.Column('teaser', sa.String(length=200), nullable=True))
+
+    op.execute(
+        "UPDATE reports SET teaser = substr(summary, 1, 200) WHERE teaser IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.drop_column('teaser')
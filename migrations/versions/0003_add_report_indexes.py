@@ -0,0 +1,28 @@
+"""add report indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reports_created_at', 'reports', ['created_at'], unique=False)
+    op.create_index(
+        'uq_reports_item_name_item_type', 'reports', ['item_name', 'item_type'], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_reports_item_name_item_type', table_name='reports')
+    op.drop_index('ix_reports_created_at', table_name='reports')
@@ -0,0 +1,40 @@
+"""add report metrics table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('report_id', sa.Integer(), nullable=False),
+        sa.Column('model', sa.String(length=200), nullable=True),
+        sa.Column('prompt_chars', sa.Integer(), nullable=True),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('attempt_ms', sa.Text(), nullable=True),
+        sa.Column('retries', sa.Integer(), nullable=False),
+        sa.Column('readme_chars', sa.Integer(), nullable=True),
+        sa.Column('readme_truncated', sa.Boolean(), nullable=False),
+        sa.Column('job_ms', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('report_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('report_metrics')
@@ -0,0 +1,30 @@
+"""add site state table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    site_state = op.create_table(
+        'site_state',
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.bulk_insert(site_state, [{'key': 'report_generation', 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('site_state')
@@ -3,24 +3,223 @@ from datetime import datetime, timezone
 
 from extensions import db
 
+TEASER_LENGTH = 200
+
 
 class Report(db.Model):
     __tablename__ = "reports"
+    __table_args__ = (
+        db.Index("ix_reports_created_at", "created_at"),
+        db.Index(
+            "uq_reports_item_name_item_type", "item_name", "item_type", unique=True
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(500), nullable=False)
     item_name = db.Column(db.String(500), nullable=False)
     item_type = db.Column(db.String(10), nullable=False)  # "model" or "dataset"
-    summary = db.Column(db.Text, nullable=False)
-    ideas = db.Column(db.Text, nullable=False)  # JSON array of strings
-    metadata_json = db.Column("metadata", db.Text)
+    teaser = db.Column(db.String(TEASER_LENGTH))  # summary excerpt for listings
+    # Large Text columns are deferred so listing queries never load them
+    summary = db.deferred(db.Column(db.Text, nullable=False))
+    ideas = db.deferred(db.Column(db.Text, nullable=False))  # JSON array of strings
+    metadata_json = db.deferred(db.Column("metadata", db.Text))
     created_at = db.Column(
         db.DateTime, default=lambda: datetime.now(timezone.utc)
     )
 
+    metrics = db.relationship(
+        "ReportMetrics", back_populates="report", uselist=False,
+        cascade="all, delete-orphan",
+    )
+
     @property
     def ideas_list(self):
         return json.loads(self.ideas)
 
+    @classmethod
+    def from_generation(cls, metadata, result, metrics=None):
+        """Build an unsaved Report from item metadata and an LLM result.
+
+        If a metrics dict from the generation pipeline is given, a
+        ReportMetrics row is attached and saved with the report.
+        """
+        report = cls(
+            title=result["title"],
+            item_name=metadata["id"],
+            item_type=metadata["type"],
+            summary=result["summary"],
+            teaser=make_teaser(result["summary"]),
+            ideas=json.dumps(result["ideas"]),
+            metadata_json=json.dumps(metadata, default=str),
+        )
+        if metrics is not None:
+            report.metrics = ReportMetrics.from_stats(metrics)
+        return report
+
+    @classmethod
+    def used_item_names(cls, candidates):
+        """Return the subset of candidate item names already reported on.
+
+        Sends the candidates to the database in a single IN query, so the
+        cost is bounded by the candidate pool rather than the archive size.
+        """
+        candidates = list(candidates)
+        if not candidates:
+            return set()
+        rows = db.session.query(cls.item_name).filter(
+            cls.item_name.in_(candidates)
+        )
+        return {row.item_name for row in rows}
+
+    @classmethod
+    def listing_page(cls, cursor=None, per_page=20):
+        """Return one page of the newest-first report listing.
+
+        Uses keyset pagination on (created_at, id) rather than OFFSET, and
+        only selects the columns the listing template needs. Rows written
+        before the teaser column existed fall back to a database-side substr()
+        so the large Text columns never leave PostgreSQL.
+
+        Args:
+            cursor: Opaque cursor from a previous page, or None for the first.
+            per_page: Number of reports per page.
+
+        Returns:
+            Tuple of (rows, next_cursor). next_cursor is None on the last page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        query = db.session.query(
+            cls.id,
+            cls.title,
+            cls.item_name,
+            cls.item_type,
+            cls.created_at,
+            db.func.coalesce(
+                cls.teaser, db.func.substr(cls.summary, 1, TEASER_LENGTH)
+            ).label("teaser"),
+        )
+
+        if cursor:
+            created_at, report_id = decode_cursor(cursor)
+            query = query.filter(
+                db.or_(
+                    cls.created_at < created_at,
+                    db.and_(cls.created_at == created_at, cls.id < report_id),
+                )
+            )
+
+        # Fetch one extra row to find out whether there is a next page
+        rows = (
+            query.order_by(cls.created_at.desc(), cls.id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        return rows, next_cursor
+
     def __repr__(self):
         return f"<Report {self.id}: {self.title}>"
+
+
+class ReportMetrics(db.Model):
+    """How a report was generated, for tracking performance across models."""
+
+    __tablename__ = "report_metrics"
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(
+        db.Integer, db.ForeignKey("reports.id", ondelete="CASCADE"),
+        nullable=False, unique=True,
+    )
+    model = db.Column(db.String(200))
+    prompt_chars = db.Column(db.Integer)
+    # Token counts as reported by the server; NULL if it did not report them
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)  # summed over all attempts
+    attempt_ms = db.Column(db.Text)  # JSON array, latency of each LLM request
+    retries = db.Column(db.Integer, nullable=False, default=0)
+    readme_chars = db.Column(db.Integer)  # NULL if no README was available
+    readme_truncated = db.Column(db.Boolean, nullable=False, default=False)
+    job_ms = db.Column(db.Integer)  # job start to report ready
+
+    report = db.relationship("Report", back_populates="metrics")
+
+    @property
+    def attempt_ms_list(self):
+        return json.loads(self.attempt_ms) if self.attempt_ms else []
+
+    @classmethod
+    def from_stats(cls, stats):
+        """Build unsaved metrics from a GenerationPipeline metrics dict."""
+        attempts = stats.get("attempt_ms") or []
+        return cls(
+            model=stats.get("model"),
+            prompt_chars=stats.get("prompt_chars"),
+            prompt_tokens=stats.get("prompt_tokens"),
+            completion_tokens=stats.get("completion_tokens"),
+            attempt_ms=json.dumps(attempts),
+            retries=max(len(attempts) - 1, 0),
+            readme_chars=stats.get("readme_chars"),
+            readme_truncated=bool(stats.get("readme_truncated")),
+            job_ms=stats.get("job_ms"),
+        )
+
+    def __repr__(self):
+        return f"<ReportMetrics for report {self.report_id}>"
+
+
+class SiteState(db.Model):
+    """Small named counters shared by every process that serves the site."""
+
+    __tablename__ = "site_state"
+
+    # Bumped in the same transaction as any change to the report listing
+    REPORT_GENERATION = "report_generation"
+
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def get_value(cls, key):
+        """Return the counter's value, or 0 if it was never set."""
+        value = db.session.query(cls.value).filter(cls.key == key).scalar()
+        return value or 0
+
+    @classmethod
+    def bump(cls, key):
+        """Increment a counter in the current transaction."""
+        result = db.session.execute(
+            db.update(cls).where(cls.key == key).values(value=cls.value + 1)
+        )
+        if result.rowcount == 0:
+            db.session.add(cls(key=key, value=1))
+
+    def __repr__(self):
+        return f"<SiteState {self.key}={self.value}>"
+
+
+def make_teaser(summary):
+    """Return the listing excerpt stored alongside a report's summary."""
+    return summary[:TEASER_LENGTH]
+
+
+def encode_cursor(created_at, report_id):
+    """Build a listing cursor pointing just past the given report."""
+    return f"{created_at.isoformat()}_{report_id}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor produced by encode_cursor into (created_at, id)."""
+    try:
+        created_at, report_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(report_id)
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,170 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English markdown with Llama-style tokenizers
+CHARS_PER_TOKEN = 4
+
+# Section headings worth the most / least prompt budget. Matched as
+# lowercase substrings of the heading text.
+HIGH_VALUE_HEADINGS = (
+    "summary", "overview", "description", "introduction", "about",
+    "model details", "dataset details", "intended use", "uses",
+    "capabilities", "features", "highlights", "tasks", "dataset structure",
+    "data fields", "languages", "limitations", "bias", "architecture",
+)
+LOW_VALUE_HEADINGS = (
+    "citation", "bibtex", "license", "acknowledg", "contact", "author",
+    "changelog", "news", "update", "install", "requirements", "quickstart",
+    "how to use", "usage", "example", "training hyperparameters",
+    "framework versions", "evaluation", "results", "benchmark", "metrics",
+    "environmental impact", "compute infrastructure", "more information",
+    "card authors", "card contact", "disclaimer",
+)
+
+_FRONT_MATTER_RE = re.compile(r"\A---\s*\n.*?\n---\s*\n", re.DOTALL)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_FENCED_CODE_RE = re.compile(r"^(```|~~~).*?^\1[^\n]*$", re.DOTALL | re.MULTILINE)
+_UNCLOSED_FENCE_RE = re.compile(r"^(```|~~~).*\Z", re.DOTALL | re.MULTILINE)
+_LINKED_IMAGE_RE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)")
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_TABLE_BLOCK_RE = re.compile(r"(?:^[ \t]*\|.*\|[ \t]*\n?){2,}", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$", re.MULTILINE)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting, no tokenizer needed."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clean_readme(text):
+    """Strip markup that costs tokens but carries little meaning.
+
+    Removes YAML front matter, HTML comments and tags, badges and images,
+    fenced code blocks and markdown tables (mostly benchmark numbers), and
+    unwraps links to their text.
+    """
+    text = text.replace("\r\n", "\n")
+    text = _FRONT_MATTER_RE.sub("", text)
+    text = _HTML_COMMENT_RE.sub("", text)
+    text = _FENCED_CODE_RE.sub("", text)
+    text = _UNCLOSED_FENCE_RE.sub("", text)  # e.g. cut off by truncation
+    text = _LINKED_IMAGE_RE.sub("", text)
+    text = _IMAGE_RE.sub("", text)
+    text = _HTML_TAG_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _TABLE_BLOCK_RE.sub("", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip()
+
+
+def split_sections(text):
+    """Split markdown into (heading, body) pairs; the preamble has heading ""."""
+    sections = []
+    matches = list(_HEADING_RE.finditer(text))
+
+    preamble = text[:matches[0].start()] if matches else text
+    if preamble.strip():
+        sections.append(("", preamble.strip()))
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        sections.append((match.group(0).strip(), body))
+    return sections
+
+
+def _score_section(heading, body, position):
+    """Higher is more useful to the summary; <= 0 is dropped entirely."""
+    if not body:
+        return 0
+    title = heading.lstrip("#").strip().lower()
+
+    score = 10 - min(position, 8)  # earlier sections tend to matter more
+    if position == 0:
+        score += 10  # the opening section usually is the project description
+    if any(key in title for key in HIGH_VALUE_HEADINGS):
+        score += 10
+    if any(key in title for key in LOW_VALUE_HEADINGS):
+        score -= 15
+    return score
+
+
+def _truncate_to_tokens(text, tokens):
+    """Cut text to roughly `tokens`, preferring a paragraph boundary."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip() + " ..."
+
+
+def condense_readme(text, token_budget):
+    """Clean a README and pack its most useful sections into a token budget.
+
+    Sections are ranked by heading and position, chosen greedily until the
+    budget is spent, and emitted in their original order so the result still
+    reads like the README.
+
+    Args:
+        text: Raw README markdown.
+        token_budget: Approximate maximum tokens for the result.
+
+    Returns:
+        The condensed README text (possibly empty).
+    """
+    # Headings left empty by cleaning (e.g. a code-only "Usage") are dropped
+    sections = [
+        (heading, body)
+        for heading, body in split_sections(clean_readme(text))
+        if body
+    ]
+    blocks = [f"{heading}\n\n{body}" if heading else body for heading, body in sections]
+
+    if sum(estimate_tokens(block) + 1 for block in blocks) <= token_budget:
+        condensed = "\n\n".join(blocks)
+        logger.info(
+            "Condensed README from %d to %d chars (fits budget of %d tokens)",
+            len(text), len(condensed), token_budget,
+        )
+        return condensed
+
+    ranked = sorted(
+        (
+            (_score_section(heading, body, i), i)
+            for i, (heading, body) in enumerate(sections)
+        ),
+        key=lambda pair: (-pair[0], pair[1]),
+    )
+
+    remaining = token_budget
+    chosen = {}
+    for score, i in ranked:
+        if score <= 0 or remaining <= 0:
+            break
+        block = blocks[i]
+        cost = estimate_tokens(block) + 1
+        if cost > remaining:
+            # Only worth a partial section if a meaningful slice still fits
+            if remaining < 100:
+                continue
+            block = _truncate_to_tokens(block, remaining)
+            cost = remaining
+        chosen[i] = block
+        remaining -= cost
+
+    condensed = "\n\n".join(chosen[i] for i in sorted(chosen))
+    logger.info(
+        "Condensed README from %d to %d chars (%d of %d sections, budget %d tokens)",
+        len(text), len(condensed), len(chosen), len(sections), token_budget,
+    )
+    return condensed
@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomic(path, data, mode=None):
+    """Write bytes to `path` via a temp file and rename.
+
+    Readers never see a partial file. `mode` sets the file's permissions;
+    by default it keeps mkstemp's owner-only 0600.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class BoundedFileStore:
+    """Directory of files keyed by string, bounded in size by LRU eviction.
+
+    Keys are hashed to file names, reads refresh a file's mtime, and
+    writes are atomic. Once the directory grows past `max_bytes`, the least
+    recently used files are evicted.
+
+    Pruning lists and stats the whole directory, so it runs at most once
+    per `prune_slack` bytes written by this process (and on its first
+    write), letting the directory overshoot by about that much. With
+    `background_prune`, it also runs on a daemon thread instead of inside
+    the write.
+
+    Args:
+        directory: Where the files live; created on first write.
+        max_bytes: Size bound for the directory.
+        prune_slack: Bytes written between prunes; 0 prunes on every write.
+        background_prune: Prune on a background thread.
+    """
+
+    SUFFIX = ".bin"
+
+    def __init__(self, directory, max_bytes, prune_slack=0, background_prune=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.prune_slack = prune_slack
+        self.background_prune = background_prune
+        self._unpruned = None  # bytes written since the last prune
+        self._prune_lock = threading.Lock()
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + self.SUFFIX)
+
+    def read(self, key):
+        """Return the stored bytes for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Mark as recently used for LRU eviction
+        os.utime(path)
+        return data
+
+    def write(self, key, data):
+        """Store bytes for `key`, pruning when enough has been written."""
+        write_atomic(self._path(key), data)
+
+        with self._prune_lock:
+            due = self._unpruned is None or self._unpruned + len(data) > self.prune_slack
+            self._unpruned = 0 if due else self._unpruned + len(data)
+        if not due:
+            return
+        if self.background_prune:
+            threading.Thread(target=self._prune_quietly, daemon=True).start()
+        else:
+            self.prune()
+
+    def _prune_quietly(self):
+        try:
+            self.prune()
+        except OSError as e:
+            logger.warning("Pruning %s failed: %s", self.directory, e)
+
+    def _entries(self):
+        """Return (mtime, size, path) for every entry, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for name in names:
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def stats(self):
+        """Return (entry_count, total_bytes)."""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def prune(self, max_bytes=None):
+        """Evict least recently used entries until under the size bound.
+
+        Returns:
+            The number of entries removed.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info("Evicted %d entries from %s", removed, self.directory)
+        return removed
+
+    def clear(self):
+        """Remove every entry. Returns the number of entries removed."""
+        return self.prune(max_bytes=0)
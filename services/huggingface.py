@@ -1,20 +1,48 @@
+import codecs
 import logging
 import random
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice, zip_longest
 
-from huggingface_hub import HfApi, hf_hub_download
+from huggingface_hub import (
+    DatasetInfo,
+    ModelInfo,
+    constants,
+    get_hf_file_metadata,
+    hf_hub_url,
+)
+from huggingface_hub.utils import (
+    build_hf_headers,
+    get_session,
+    hf_raise_for_status,
+    paginate,
+)
+
+from services.timing import span
 
 logger = logging.getLogger(__name__)
 
 MAX_README_LENGTH = 20000
+# Worst-case UTF-8 size of MAX_README_LENGTH characters
+MAX_README_BYTES = MAX_README_LENGTH * 4
+README_CHUNK_SIZE = 16 * 1024
+# Appended to READMEs cut off at MAX_README_LENGTH
+TRUNCATION_MARKER = "\n\n[... truncated ...]"
+
+# Trending items fetched per listing per round, and the deepest rank scanned
+TRENDING_PAGE_SIZE = 20
+MAX_TRENDING_SCAN = 500
 
 
-def fetch_trending_item(token=None, used_names=None):
+def fetch_trending_item(token=None, filter_used=None):
     """Fetch trending models & datasets, pick an unused one at random.
 
     Args:
         token: Optional HuggingFace API token.
-        used_names: Set of item_name strings already reported on.
+        filter_used: Callable taking a list of candidate repo ids and returning
+            the set of those already reported on. Defaults to treating every
+            candidate as unused.
 
     Returns:
         A metadata dict for the selected item.
@@ -22,47 +50,168 @@ def fetch_trending_item(token=None, used_names=None):
     Raises:
         RuntimeError: If no unused trending items can be found.
     """
-    if used_names is None:
-        used_names = set()
+    return fetch_trending_candidates(1, token=token, filter_used=filter_used)[0]
 
-    api = HfApi(token=token)
-    logger.info("Querying HuggingFace API for trending items (used_names: %d)", len(used_names))
 
-    # Try with 20 first, expand to 50 if all are used
-    for limit in (20, 50):
-        logger.info("Fetching top %d trending models...", limit)
-        models = list(
-            api.list_models(sort="trending_score", direction=-1, limit=limit)
-        )
-        logger.info("Fetched %d models", len(models))
+def fetch_trending_candidates(count, token=None, filter_used=None):
+    """Pick up to `count` unused trending items at random, in random order.
 
-        logger.info("Fetching top %d trending datasets...", limit)
-        datasets = list(
-            api.list_datasets(sort="trending_score", direction=-1, limit=limit)
-        )
-        logger.info("Fetched %d datasets", len(datasets))
+    Candidates are drawn from the highest trending tier that has any unused
+    items, the same pool fetch_trending_item chooses from, so any of them is
+    an equally valid pick. Callers can prefetch data for all of them and go
+    with whichever is ready first.
 
-        pool = [(m, "model") for m in models] + [(d, "dataset") for d in datasets]
-        logger.info("Total pool: %d items (%d models + %d datasets)", len(pool), len(models), len(datasets))
+    Args:
+        count: Maximum number of candidates wanted.
+        token: Optional HuggingFace API token.
+        filter_used: Callable taking a list of candidate repo ids and returning
+            the set of those already reported on.
 
-        # Filter out previously used items
-        available = [(item, t) for item, t in pool if item.id not in used_names]
-        logger.info("Available after dedup: %d of %d", len(available), len(pool))
+    Returns:
+        A non-empty list of metadata dicts.
 
+    Raises:
+        RuntimeError: If no unused trending items can be found.
+    """
+    logger.info("Querying HuggingFace API for trending items")
+
+    for rank, available in iter_trending_candidates(token=token, filter_used=filter_used):
         if available:
-            item, item_type = random.choice(available)
-            logger.info("Selected: %s (%s)", item.id, item_type)
-            return _extract_metadata(item, item_type)
+            picked = random.sample(available, min(count, len(available)))
+            logger.info(
+                "Selected: %s", ", ".join(f"{item.id} ({t})" for item, t in picked)
+            )
+            return [_extract_metadata(item, item_type) for item, item_type in picked]
 
-        logger.warning("All %d items already used at limit=%d, expanding pool...", len(pool), limit)
+        logger.warning("All items already used down to rank %d, expanding pool...", rank)
 
-    logger.error("No unused trending items found even after expanding to limit=50")
+    logger.error("No unused trending items found in the top %d", MAX_TRENDING_SCAN)
     raise RuntimeError(
         "All trending items have already been reported on. "
         "Try again later when new items are trending."
     )
 
 
+def fetch_trending_items(count, token=None, filter_used=None):
+    """Fetch metadata for up to `count` distinct unused trending items.
+
+    Items are taken in trending order, models and datasets interleaved by
+    rank, scanning deeper pages only until enough are found.
+
+    Args:
+        count: Number of items wanted.
+        token: Optional HuggingFace API token.
+        filter_used: Callable taking a list of candidate repo ids and returning
+            the set of those already reported on.
+
+    Returns:
+        A list of metadata dicts, shorter than `count` if the scan ran out.
+    """
+    selected = []
+    for _, available in iter_trending_candidates(token=token, filter_used=filter_used):
+        selected.extend(available[:count - len(selected)])
+        if len(selected) >= count:
+            break
+
+    logger.info("Selected %d of %d requested items", len(selected), count)
+    return [_extract_metadata(item, item_type) for item, item_type in selected]
+
+
+def iter_trending_candidates(token=None, filter_used=None, page_size=TRENDING_PAGE_SIZE):
+    """Stream unused trending candidates one page of rankings at a time.
+
+    The models and datasets listings are consumed lazily and side by side:
+    each round pulls the next `page_size` items of both (one HTTP page each,
+    fetched concurrently) and checks only those ids against `filter_used`.
+    No item is ever downloaded twice, and the scan stops at
+    MAX_TRENDING_SCAN items per listing.
+
+    Args:
+        token: Optional HuggingFace API token.
+        filter_used: Callable taking a list of candidate repo ids and returning
+            the set of those already reported on.
+        page_size: Number of items per listing fetched each round.
+
+    Yields:
+        Tuples of (rank, available) where rank is the deepest trending rank
+        scanned so far and available is a list of unused (item, item_type)
+        pairs from this round, in trending order.
+    """
+    if filter_used is None:
+        filter_used = lambda ids: set()
+
+    streams = [
+        (_paginate_trending("models", token, page_size), "model"),
+        (_paginate_trending("datasets", token, page_size), "dataset"),
+    ]
+    listings = {"model": "hf.list_models", "dataset": "hf.list_datasets"}
+
+    rank = 0
+    with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+        while streams and rank < MAX_TRENDING_SCAN:
+            # Run each page in a copy of the caller's context so its timing
+            # span reaches the active collector
+            futures = [
+                executor.submit(
+                    copy_context().run, _timed_page, listings[item_type], stream, page_size, rank
+                )
+                for stream, item_type in streams
+            ]
+            pages = [(f.result(), item_type) for f, (_, item_type) in zip(futures, streams)]
+            rank += page_size
+
+            # Interleave by rank: model #1, dataset #1, model #2, ...
+            pool = [
+                pair
+                for rank_pairs in zip_longest(*[
+                    [(item, item_type) for item in page] for page, item_type in pages
+                ])
+                for pair in rank_pairs
+                if pair is not None
+            ]
+            logger.info(
+                "Fetched trending ranks %d-%d: %d items",
+                rank - page_size + 1, rank, len(pool),
+            )
+
+            # A short page means that listing has run out
+            streams = [s for s, (page, _) in zip(streams, pages) if len(page) == page_size]
+            if not pool:
+                break
+
+            with span("db.dedup", candidates=len(pool)):
+                used_names = filter_used([item.id for item, _ in pool])
+            available = [(item, t) for item, t in pool if item.id not in used_names]
+            logger.info("Available after dedup: %d of %d", len(available), len(pool))
+            yield rank, available
+
+
+def _timed_page(name, stream, page_size, offset):
+    """Pull the next page from a listing stream inside a timing span."""
+    with span(name, offset=offset) as fields:
+        page = list(islice(stream, page_size))
+        fields["items"] = len(page)
+    return page
+
+
+def _paginate_trending(kind, token, page_size):
+    """Lazily iterate a trending listing, one `page_size` HTTP page at a time.
+
+    HfApi.list_models/list_datasets use `limit` both as the page size and as
+    a hard cap on the total, so they can't page past it without restarting
+    from the top. This follows the Hub's Link headers instead.
+    """
+    info_cls = ModelInfo if kind == "models" else DatasetInfo
+    items = paginate(
+        f"{constants.ENDPOINT}/api/{kind}",
+        params={"sort": "trendingScore", "direction": -1, "limit": page_size},
+        headers=build_hf_headers(token=token),
+    )
+    for item in items:
+        item.setdefault("siblings", None)
+        yield info_cls(**item)
+
+
 def _extract_metadata(item, item_type):
     """Pull relevant fields from a ModelInfo or DatasetInfo object."""
     meta = {
@@ -87,40 +236,118 @@ def _extract_metadata(item, item_type):
     return meta
 
 
-def fetch_readme(repo_id, item_type, token=None):
+def fetch_readme(repo_id, item_type, token=None, cache=None):
     """Download the README.md for a specific HuggingFace repo.
 
     Args:
         repo_id: The exact repo ID (e.g. "meta-llama/Llama-3-8B").
         item_type: "model" or "dataset" — determines the repo_type.
         token: Optional HuggingFace API token.
+        cache: Optional ReadmeCache. When given, the README's current commit
+            is resolved with a HEAD request and a cached copy for that
+            commit is returned without downloading.
 
     Returns:
         The README content as a string, or None if unavailable.
     """
     repo_type = "dataset" if item_type == "dataset" else "model"
 
-    try:
-        path = hf_hub_download(
-            repo_id=repo_id,
-            filename="README.md",
-            repo_type=repo_type,
-            token=token,
-            cache_dir=tempfile.mkdtemp(),
-        )
-        with open(path, "r", encoding="utf-8") as f:
-            content = f.read()
+    with span("hf.readme", repo=repo_id) as fields:
+        try:
+            revision = None
+            if cache is not None:
+                file_meta = get_hf_file_metadata(
+                    hf_hub_url(repo_id, "README.md", repo_type=repo_type),
+                    token=token,
+                )
+                revision = file_meta.commit_hash
+                if revision is None:
+                    # No X-Repo-Commit (e.g. behind a proxy): nothing to key
+                    # the cache on, so fetch without it
+                    logger.info("No commit hash for %s, bypassing README cache", repo_id)
+                    cache = None
+            if cache is not None:
+                content = cache.get(repo_type, repo_id, revision)
+                fields["cache_hit"] = content is not None
+                if content is not None:
+                    fields["chars"] = len(content)
+                    logger.info(
+                        "README cache hit for %s@%s (%d chars)",
+                        repo_id, revision[:8], len(content),
+                    )
+                    return content
 
-        if len(content) > MAX_README_LENGTH:
-            logger.info(
-                "README for %s is %d chars, truncating to %d",
-                repo_id, len(content), MAX_README_LENGTH,
+            content = _read_bounded(
+                hf_hub_url(repo_id, "README.md", repo_type=repo_type, revision=revision),
+                token=token,
+                repo_id=repo_id,
             )
-            content = content[:MAX_README_LENGTH] + "\n\n[... truncated ...]"
 
-        logger.info("Fetched README for %s (%d chars)", repo_id, len(content))
-        return content
+            if cache is not None:
+                cache.put(repo_type, repo_id, revision, content)
+
+            fields["chars"] = len(content)
+            logger.info("Fetched README for %s (%d chars)", repo_id, len(content))
+            return content
+
+        except Exception as e:
+            fields["failed"] = type(e).__name__
+            logger.warning("Could not fetch README for %s: %s", repo_id, e)
+            return None
+
+
+def _read_bounded(url, token, repo_id):
+    """Stream a text file, stopping once MAX_README_LENGTH chars are read.
+
+    A Range header caps the download at the worst-case UTF-8 size of
+    MAX_README_LENGTH characters, and the body is decoded incrementally so
+    neither memory nor bandwidth depends on the size of the upstream file.
+    Servers that ignore Range are still cut off by closing the stream.
+    """
+    headers = build_hf_headers(token=token)
+    headers["Range"] = f"bytes=0-{MAX_README_BYTES - 1}"
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = []
+    chars = 0
+    received = 0
+    # Same per-read timeout hf_hub_download uses, so a stalled connection
+    # fails the fetch instead of hanging the job
+    with get_session().get(
+        url, headers=headers, stream=True, timeout=constants.HF_HUB_DOWNLOAD_TIMEOUT
+    ) as response:
+        hf_raise_for_status(response)
+        total_size = _total_size(response)
+
+        for chunk in response.iter_content(chunk_size=README_CHUNK_SIZE):
+            chunk = chunk[:MAX_README_BYTES - received]
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            chunks.append(text)
+            chars += len(text)
+            if chars > MAX_README_LENGTH or received >= MAX_README_BYTES:
+                break
+
+    content = "".join(chunks)
+    truncated = chars > MAX_README_LENGTH or (
+        total_size is not None and total_size > received
+    )
+    if truncated:
+        logger.info(
+            "README for %s is %s bytes, truncating to %d chars",
+            repo_id, total_size if total_size is not None else "?", MAX_README_LENGTH,
+        )
+        content = content[:MAX_README_LENGTH] + TRUNCATION_MARKER
+    return content
+
 
-    except Exception as e:
-        logger.warning("Could not fetch README for %s: %s", repo_id, e)
-        return None
+def _total_size(response):
+    """Full size of the remote file from Content-Range/Content-Length, if known."""
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    content_length = response.headers.get("Content-Length")
+    if response.status_code == 200 and content_length and content_length.isdigit():
+        return int(content_length)
+    return None
@@ -0,0 +1,166 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_FENCE_LINE_RE = re.compile(r"^\s*(```|~~~)[\w-]*\s*$", re.MULTILINE)
+_TRAILING_COMMA_RE = re.compile(r",\s*$")
+# List markers that start an item: bullets and numbers at the start of a
+# line, or numbers right after the end of the previous sentence. A dash
+# or "2." in the middle of a sentence is left alone.
+_NUMBERED_ITEM_RE = re.compile(
+    r"^\s*(?:\d+[.)]|[-*•])\s+|(?<=[.!?;])\s+\d+[.)]\s+", re.MULTILINE
+)
+
+# How many earlier members to try dropping when closing truncated output
+MAX_TRUNCATION_BACKOFF = 20
+
+
+def loads_lenient(text):
+    """Parse LLM output as a JSON object, repairing common near-misses.
+
+    Handles code fences anywhere in the text, prose before or after the
+    object, trailing commas, raw newlines and tabs inside strings, and output
+    cut off mid-object (e.g. at max_tokens), which is closed off at the last
+    complete value.
+
+    Returns:
+        The parsed object as a dict.
+
+    Raises:
+        ValueError: If no JSON object can be recovered.
+    """
+    text = _FENCE_LINE_RE.sub("", text)
+
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object found")
+    text = text[start:]
+
+    try:
+        result, _ = json.JSONDecoder().raw_decode(text)
+    except json.JSONDecodeError:
+        repaired = _repair(text)
+        try:
+            result = json.loads(repaired)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"unrepairable JSON: {e}") from e
+        logger.info("Repaired malformed LLM JSON locally")
+
+    if not isinstance(result, dict):
+        raise ValueError("top-level JSON value is not an object")
+    return result
+
+
+def _repair(text):
+    """Rewrite near-valid JSON so that json.loads can parse it."""
+    out = []
+    stack = []
+    commas = []  # offsets in `out` of commas outside strings
+    in_string = False
+    escape = False
+
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            elif ch == "\r":
+                continue
+            elif ch == "\t":
+                ch = "\\t"
+            out.append(ch)
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch == ",":
+            commas.append(len(out))
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            commas = [i for i in commas if i < len(out)]
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                # Anything after the top-level object is prose
+                return "".join(out)
+            continue
+        out.append(ch)
+
+    # Truncated output: close the open string, then close the open
+    # containers, backing off to earlier members until the result parses
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    base = "".join(out)
+    for cut in [len(base)] + commas[::-1][:MAX_TRUNCATION_BACKOFF]:
+        candidate = _TRAILING_COMMA_RE.sub("", base[:cut].rstrip())
+        candidate += _closers(candidate)
+        try:
+            json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        logger.info("Closed truncated LLM JSON at offset %d of %d", cut, len(base))
+        return candidate
+    return base
+
+
+def _strip_trailing_comma(out):
+    """Remove a comma (and whitespace) just before a closing bracket."""
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def _closers(text):
+    """Brackets needed to close every container left open in text."""
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    return "".join(reversed(stack))
+
+
+def fit_ideas(ideas, count):
+    """Coerce an ideas list to exactly `count` entries where that is safe.
+
+    Extra ideas are dropped. A single string holding a numbered or bulleted
+    list is split into its items. Anything else is returned unchanged for
+    the caller to reject.
+    """
+    if len(ideas) > count:
+        logger.info("Trimming %d ideas to %d", len(ideas), count)
+        return ideas[:count]
+
+    if len(ideas) == 1 and isinstance(ideas[0], str):
+        parts = [p.strip() for p in _NUMBERED_ITEM_RE.split(ideas[0]) if p.strip()]
+        if len(parts) >= count:
+            logger.info("Split a single idea string into %d ideas", len(parts))
+            return parts[:count]
+
+    return ideas
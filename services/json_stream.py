@@ -0,0 +1,158 @@
+import re
+
+# Leading text tolerated before the opening brace (code fences, a short
+# "Here is the JSON:" preamble) before the output is declared malformed
+MAX_PREAMBLE_CHARS = 200
+MAX_DEPTH = 8
+
+_LITERALS = ("true", "false", "null")
+_NUMBER_PREFIX_RE = re.compile(r"-?(0|[1-9]\d*)?(\.\d*)?([eE][+-]?\d*)?")
+
+
+class MalformedJSON(ValueError):
+    """Raised when streamed output can no longer become the expected JSON."""
+
+
+class JsonStreamValidator:
+    """Incrementally checks that streamed text is a plausible JSON object.
+
+    Text is fed in arbitrary chunks as tokens arrive. The validator tracks
+    just enough state (nesting, strings, what token is expected next) to
+    decide early when the output is provably broken, so a doomed generation
+    can be cancelled instead of running to max_tokens. It is deliberately
+    tolerant of the near-misses the repair stage can fix -- a short preamble
+    or code fence, trailing commas, raw newlines inside strings -- and only
+    rejects structural errors.
+
+    Attributes:
+        complete: True once the top-level object has been closed.
+        consumed: Number of characters fed up to and including the closing
+            brace once complete (or all characters fed so far otherwise).
+    """
+
+    def __init__(self):
+        self.complete = False
+        self.consumed = 0
+        self._started = False
+        self._preamble = 0
+        # Stack of [container, expecting] where container is "{" or "[" and
+        # expecting is one of "key", "colon", "value", "comma"
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._literal = ""
+
+    def feed(self, text):
+        """Consume a chunk of output.
+
+        Raises:
+            MalformedJSON: If the output so far cannot be valid JSON.
+        """
+        for ch in text:
+            if self.complete:
+                return
+            self._feed_char(ch)
+            self.consumed += 1
+
+    def _fail(self, reason):
+        raise MalformedJSON(reason)
+
+    def _feed_char(self, ch):
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._stack.append(["{", "key"])
+                return
+            self._preamble += 1
+            if self._preamble > MAX_PREAMBLE_CHARS:
+                self._fail("no JSON object in the first %d chars" % MAX_PREAMBLE_CHARS)
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                self._value_done()
+            return
+
+        if self._literal:
+            if ch.isalnum() or ch in ".+-":
+                self._literal += ch
+                self._check_literal()
+                return
+            self._value_done()
+            self._literal = ""
+
+        if ch.isspace():
+            return
+
+        frame = self._stack[-1]
+        container, expecting = frame
+
+        if expecting == "key":
+            if ch == '"':
+                self._in_string = True
+            elif ch == "}" and container == "{":
+                self._close("{")
+            else:
+                self._fail("expected an object key, got %r" % ch)
+        elif expecting == "colon":
+            if ch != ":":
+                self._fail("expected ':' after key, got %r" % ch)
+            frame[1] = "value"
+        elif expecting == "value":
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._open("{", "key")
+            elif ch == "[":
+                self._open("[", "value")
+            elif ch == "]" and container == "[":
+                self._close("[")  # empty array, or a trailing comma
+            elif ch == "}" and container == "{":
+                self._close("{")  # trailing comma after the last member
+            elif ch.isalnum() or ch == "-":
+                self._literal = ch
+                self._check_literal()
+            else:
+                self._fail("expected a value, got %r" % ch)
+        else:  # comma
+            if ch == ",":
+                frame[1] = "key" if container == "{" else "value"
+            elif ch in "}]":
+                self._close(ch.replace("}", "{").replace("]", "["))
+            else:
+                self._fail("expected ',' or closing bracket, got %r" % ch)
+
+    def _open(self, container, expecting):
+        if len(self._stack) >= MAX_DEPTH:
+            self._fail("nesting deeper than %d" % MAX_DEPTH)
+        self._stack.append([container, expecting])
+
+    def _close(self, container):
+        if self._stack[-1][0] != container:
+            self._fail("mismatched closing bracket for %r" % self._stack[-1][0])
+        self._stack.pop()
+        if not self._stack:
+            self.complete = True
+        else:
+            self._value_done()
+
+    def _value_done(self):
+        """Advance the enclosing container past a finished key or value."""
+        frame = self._stack[-1]
+        if frame[0] == "{" and frame[1] == "key":
+            frame[1] = "colon"
+        else:
+            frame[1] = "comma"
+
+    def _check_literal(self):
+        literal = self._literal
+        if any(word.startswith(literal) for word in _LITERALS):
+            return
+        match = _NUMBER_PREFIX_RE.match(literal)
+        if match is None or match.end() != len(literal):
+            self._fail("invalid literal %r" % literal)
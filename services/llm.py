@@ -1,8 +1,19 @@
+import asyncio
+import functools
+import itertools
 import json
 import logging
+import threading
 import time
+import weakref
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, BadRequestError, OpenAI
+
+from services.condense import condense_readme, estimate_tokens
+from services.json_repair import fit_ideas, loads_lenient
+from services.json_stream import JsonStreamValidator, MalformedJSON
+from services.timing import span
 
 logger = logging.getLogger(__name__)
 
@@ -36,19 +47,164 @@ IMPORTANT RULES:
 - Every project idea must be feasible given the model/dataset's stated capabilities.
 - If the metadata is sparse and no README is available, say so honestly rather than speculating.
 - Do NOT hallucinate features, benchmarks, or capabilities not present in the metadata or README.
+
+Generate the report as a JSON object with keys: "title", "summary", "ideas".
+Remember: "ideas" must be an array of 5 plain strings, not objects.
 """
 
+# Everything static lives in SYSTEM_PROMPT so it forms an identical prefix
+# on every request, which the server can serve from its KV cache; only the
+# per-item data below varies.
 USER_PROMPT_TEMPLATE = """Here is the metadata for today's trending HuggingFace {item_type}:
 
 ```json
 {metadata_json}
 ```
+{readme_section}"""
 
-Generate the report as a JSON object with keys: "title", "summary", "ideas".
-Remember: "ideas" must be an array of 5 plain strings, not objects."""
+# The README goes outside the JSON block so it isn't inflated by escaping
+README_SECTION_TEMPLATE = """
+Here is the project's README (condensed to its most relevant sections):
+
+<readme>
+{readme}
+</readme>
+"""
+
+DEFAULT_README_TOKEN_BUDGET = 3000
+
+# Seconds to wait for the connection vs. for the (slow) completion itself
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_TIMEOUT = 600.0
+
+# Keep-alive pool shared by every request through one client
+POOL_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0
+)
+
+# Chunks read past the end of a streamed object, waiting for the usage chunk
+MAX_TRAILING_CHUNKS = 16
+
+IDEA_COUNT = 5
+MAX_TITLE_LENGTH = 100
+
+# JSON schema for the report, sent as a structured-output constraint so the
+# server's sampler can only produce matching JSON
+REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string", "maxLength": MAX_TITLE_LENGTH},
+        "summary": {"type": "string"},
+        "ideas": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": IDEA_COUNT,
+            "maxItems": IDEA_COUNT,
+        },
+    },
+    "required": ["title", "summary", "ideas"],
+    "additionalProperties": False,
+}
+
+# Values accepted for the json_mode argument
+JSON_MODES = ("schema", "json", "off")
+
+_clients = {}
+_clients_lock = threading.Lock()
+# Async clients are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client(ollama_url, api_key, timeout=DEFAULT_TIMEOUT,
+               connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Return a shared OpenAI client for this endpoint, creating it on first use.
+
+    Clients are cached per (ollama_url, api_key, timeouts) so repeated
+    generations reuse one keep-alive connection pool instead of paying for
+    a new connection and TLS handshake per report.
+    """
+    key = (ollama_url.rstrip("/"), api_key, timeout, connect_timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info("Creating LLM client for %s", key[0])
+            client = OpenAI(
+                base_url=f"{key[0]}/v1",
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=POOL_LIMITS,
+                    timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_client(ollama_url, api_key, timeout=DEFAULT_TIMEOUT,
+                     connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+    """Async counterpart of get_client, cached per running event loop."""
+    key = (ollama_url.rstrip("/"), api_key, timeout, connect_timeout)
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        logger.info("Creating async LLM client for %s", key[0])
+        client = AsyncOpenAI(
+            base_url=f"{key[0]}/v1",
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                limits=POOL_LIMITS,
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            ),
+        )
+        clients[key] = client
+    return client
 
 
-def generate_report(metadata, ollama_url, api_key, model):
+async def awarm_up(ollama_url, api_key, model, keep_alive=None, timeout=DEFAULT_TIMEOUT):
+    """Load the model and prefill SYSTEM_PROMPT before the real request.
+
+    Uses Ollama's native /api/chat with a one-token generation, which loads
+    the model into memory (honouring keep_alive) and leaves the static
+    system prompt in the server's prompt cache, so the report request only
+    has to prefill the per-item data. Failures are logged, never raised:
+    the report request works without a warm-up, just more slowly.
+
+    Returns:
+        True if the warm-up succeeded.
+    """
+    payload = {
+        "model": model,
+        "messages": [{"role": "system", "content": SYSTEM_PROMPT}],
+        "stream": False,
+        "options": {"num_predict": 1},
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+
+    start = time.time()
+    try:
+        with span("llm.warm_up"):
+            async with httpx.AsyncClient() as http:
+                response = await http.post(
+                    f"{ollama_url.rstrip('/')}/api/chat",
+                    json=payload,
+                    headers={"Authorization": f"Bearer {api_key}"},
+                    timeout=timeout,
+                )
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning("LLM warm-up failed, continuing without it: %s", e)
+        return False
+
+    logger.info("LLM warm-up finished in %.1fs", time.time() - start)
+    return True
+
+
+def generate_report(metadata, ollama_url, api_key, model,
+                    readme_token_budget=DEFAULT_README_TOKEN_BUDGET,
+                    timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                    stream=False, json_mode="schema", keep_alive=None,
+                    stats=None):
     """Send metadata to the LLM and parse the structured response.
 
     Args:
@@ -56,6 +212,23 @@ def generate_report(metadata, ollama_url, api_key, model):
         ollama_url: Base URL for the Ollama server.
         api_key: API key for authentication.
         model: Model name to use.
+        readme_token_budget: Approximate token budget for the README after
+            condensation.
+        timeout: Seconds to wait for a completion.
+        connect_timeout: Seconds to wait for the connection to the server.
+        stream: Stream the completion and validate it as it arrives, so
+            malformed output is cancelled and retried without waiting for
+            the full response.
+        json_mode: "schema" to constrain output to REPORT_SCHEMA, "json" for
+            plain JSON mode, or "off" to rely on the prompt alone. Servers
+            that reject the response_format fall back to "off".
+        keep_alive: How long Ollama should keep the model loaded after the
+            request (e.g. "30m", "24h", -1 for forever). None uses the
+            server default.
+        stats: Optional dict filled with how the report was produced:
+            prompt_chars, prompt_tokens and completion_tokens (None if the
+            server does not report usage), and attempt_ms, the latency of
+            each LLM request. Filled even if generation fails.
 
     Returns:
         Dict with keys: title, summary, ideas.
@@ -63,39 +236,169 @@ def generate_report(metadata, ollama_url, api_key, model):
     Raises:
         ValueError: If the LLM response cannot be parsed as valid JSON.
     """
+    messages = _build_messages(metadata, ollama_url, model, readme_token_budget)
+    client = get_client(ollama_url, api_key, timeout, connect_timeout)
+    complete = functools.partial(
+        _complete, client, model, stream=stream, keep_alive=keep_alive
+    )
+
+    steps = _report_steps(messages, json_mode)
+    attempts = []
+    raw_text = None
+    use_format = True
+    try:
+        for attempt in itertools.count(1):
+            request_messages, response_format = steps.send(raw_text)
+            if not use_format:
+                response_format = None
+            with span("llm.attempt", attempt=attempt, stream=stream) as fields:
+                attempts.append(fields)
+                try:
+                    raw_text = complete(request_messages, response_format, usage=fields)
+                except BadRequestError as e:
+                    if response_format is None:
+                        raise
+                    logger.warning(
+                        "LLM server rejected response_format (%s), continuing without it", e
+                    )
+                    use_format = False
+                    raw_text = complete(request_messages, None, usage=fields)
+                fields["chars"] = len(raw_text) if raw_text is not None else None
+    except StopIteration as done:
+        return done.value
+    finally:
+        _fill_stats(stats, messages, attempts)
+
+
+async def agenerate_report(metadata, ollama_url, api_key, model,
+                           readme_token_budget=DEFAULT_README_TOKEN_BUDGET,
+                           timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                           stream=False, json_mode="schema", keep_alive=None,
+                           stats=None):
+    """Async version of generate_report, using AsyncOpenAI.
+
+    Takes the same arguments and follows the same attempt/repair/retry
+    sequence, so many reports can be generated concurrently on one event
+    loop.
+    """
+    messages = _build_messages(metadata, ollama_url, model, readme_token_budget)
+    client = get_async_client(ollama_url, api_key, timeout, connect_timeout)
+    complete = functools.partial(
+        _acomplete, client, model, stream=stream, keep_alive=keep_alive
+    )
+
+    steps = _report_steps(messages, json_mode)
+    attempts = []
+    raw_text = None
+    use_format = True
+    try:
+        for attempt in itertools.count(1):
+            request_messages, response_format = steps.send(raw_text)
+            if not use_format:
+                response_format = None
+            with span("llm.attempt", attempt=attempt, stream=stream) as fields:
+                attempts.append(fields)
+                try:
+                    raw_text = await complete(request_messages, response_format, usage=fields)
+                except BadRequestError as e:
+                    if response_format is None:
+                        raise
+                    logger.warning(
+                        "LLM server rejected response_format (%s), continuing without it", e
+                    )
+                    use_format = False
+                    raw_text = await complete(request_messages, None, usage=fields)
+                fields["chars"] = len(raw_text) if raw_text is not None else None
+    except StopIteration as done:
+        return done.value
+    finally:
+        _fill_stats(stats, messages, attempts)
+
+
+def _fill_stats(stats, messages, attempts):
+    """Summarize the attempts of one generation into the caller's stats dict."""
+    if stats is None:
+        return
+    stats["prompt_chars"] = sum(len(m["content"]) for m in messages)
+    # Token counts stay None unless the server reported them for every attempt
+    reported = [a.get("completion_tokens") for a in attempts]
+    stats["prompt_tokens"] = attempts[0].get("prompt_tokens") if attempts else None
+    stats["completion_tokens"] = (
+        sum(reported) if reported and None not in reported else None
+    )
+    stats["attempt_ms"] = [a.get("ms") for a in attempts]
+
+
+def _build_messages(metadata, ollama_url, model, readme_token_budget):
+    """Log the request context and build the initial chat messages."""
     logger.info("Preparing LLM request for %s (%s)", metadata["id"], metadata["type"])
     logger.info("LLM endpoint: %s, model: %s", ollama_url, model)
     has_readme = "readme" in metadata
     logger.info("README included: %s%s", has_readme,
                 f" ({len(metadata['readme'])} chars)" if has_readme else "")
 
-    client = OpenAI(
-        base_url=f"{ollama_url.rstrip('/')}/v1",
-        api_key=api_key,
-    )
-
-    user_content = USER_PROMPT_TEMPLATE.format(
-        item_type=metadata["type"],
-        metadata_json=json.dumps(metadata, indent=2, default=str),
-    )
+    with span("llm.prompt_build") as fields:
+        user_content = build_user_prompt(metadata, readme_token_budget)
+        fields["chars"] = len(SYSTEM_PROMPT) + len(user_content)
 
     prompt_length = len(SYSTEM_PROMPT) + len(user_content)
-    logger.info("Total prompt length: %d chars", prompt_length)
+    logger.info(
+        "Total prompt length: %d chars (~%d tokens)",
+        prompt_length, estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user_content),
+    )
 
-    messages = [
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_content},
     ]
 
+
+def _report_steps(messages, json_mode):
+    """The attempt/repair/retry sequence for one report, free of any I/O.
+
+    A generator that yields (messages, response_format) for each LLM call
+    it needs and expects the raw response text (or None) to be sent back,
+    so the same logic drives both the sync and async clients.
+
+    Returns:
+        The validated report dict (as the StopIteration value).
+
+    Raises:
+        ValueError: If no valid report is produced after retrying.
+    """
     logger.info("Sending request to LLM (attempt 1)...")
-    result = _call_and_parse(client, model, messages)
+    raw_text = yield messages, _response_format(json_mode)
+
+    result = _parse(raw_text)
     if result is not None:
-        logger.info("LLM returned valid report: '%s'", result["title"])
-        return result
+        report, problems = _check_fields(result)
+        if not problems:
+            logger.info("LLM returned valid report: '%s'", report["title"])
+            return report
 
-    # Retry once with a nudge
-    logger.warning("First LLM attempt failed, retrying with nudge (attempt 2)...")
-    messages.append(
+        # Only some fields are bad: ask for just those in a short follow-up
+        # on the same conversation instead of regenerating everything
+        logger.warning(
+            "LLM result has invalid fields (%s), regenerating only those (attempt 2)...",
+            ", ".join(problems),
+        )
+        followup = messages + [
+            {"role": "assistant", "content": raw_text},
+            {"role": "user", "content": _followup_prompt(report, problems)},
+        ]
+        fix = _parse((yield followup, _response_format(
+            json_mode, _followup_schema(report, problems)
+        )))
+        if fix is not None:
+            report, problems = _check_fields(_merge_fix(report, fix, problems))
+            if not problems:
+                logger.info("LLM partial regeneration succeeded: '%s'", report["title"])
+                return report
+        logger.warning("Partial regeneration failed (%s)", ", ".join(problems))
+
+    # Retry once with a nudge; with structured output this is only a fallback
+    logger.warning("LLM attempt failed, retrying full report with nudge...")
+    messages = messages + [
         {
             "role": "user",
             "content": (
@@ -104,61 +407,201 @@ def generate_report(metadata, ollama_url, api_key, model):
                 '"title", "summary", "ideas".'
             ),
         }
-    )
+    ]
 
-    result = _call_and_parse(client, model, messages)
+    result = _parse((yield messages, _response_format(json_mode)))
     if result is not None:
-        logger.info("LLM retry succeeded: '%s'", result["title"])
-        return result
+        report, problems = _check_fields(result, final=True)
+        if not problems:
+            logger.info("LLM retry succeeded: '%s'", report["title"])
+            return report
 
-    logger.error("LLM failed to produce valid JSON after 2 attempts")
+    logger.error("LLM failed to produce a valid report after retry")
     raise ValueError("LLM failed to produce valid JSON after retry.")
 
 
-def _call_and_parse(client, model, messages):
-    """Make an LLM call and attempt to parse the response as JSON."""
-    start = time.time()
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0.7,
-        max_tokens=2000,
+def build_user_prompt(metadata, readme_token_budget=DEFAULT_README_TOKEN_BUDGET):
+    """Render the user message: compact metadata JSON plus condensed README."""
+    fields = {k: v for k, v in metadata.items() if k != "readme"}
+
+    readme_section = ""
+    if metadata.get("readme"):
+        readme = condense_readme(metadata["readme"], readme_token_budget)
+        if readme:
+            readme_section = README_SECTION_TEMPLATE.format(readme=readme)
+
+    return USER_PROMPT_TEMPLATE.format(
+        item_type=metadata["type"],
+        metadata_json=json.dumps(fields, default=str, sort_keys=True),
+        readme_section=readme_section,
     )
+
+
+def _response_format(json_mode, schema=REPORT_SCHEMA):
+    """Map a json_mode setting to the OpenAI response_format parameter."""
+    if json_mode not in JSON_MODES:
+        raise ValueError(f"json_mode must be one of {JSON_MODES}, got {json_mode!r}")
+    if json_mode == "schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "report", "schema": schema, "strict": True},
+        }
+    if json_mode == "json":
+        return {"type": "json_object"}
+    return None
+
+
+def _completion_kwargs(model, messages, response_format, keep_alive=None):
+    """Shared chat.completions.create arguments for streamed and blocking calls."""
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": 2000,
+    }
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    if keep_alive is not None:
+        kwargs["extra_body"] = {"keep_alive": keep_alive}
+    return kwargs
+
+
+def _complete(client, model, messages, response_format=None, stream=False,
+              keep_alive=None, usage=None):
+    """Make an LLM call and return the raw response text.
+
+    If `usage` is a dict, the token counts reported by the server are
+    stored in it under "prompt_tokens" and "completion_tokens".
+
+    Returns None if a streamed response was cancelled as malformed.
+    """
+    start = time.time()
+    kwargs = _completion_kwargs(model, messages, response_format, keep_alive)
+    if stream:
+        raw_text = _stream_completion(client, kwargs, usage)
+        if raw_text is None:
+            logger.info("LLM stream aborted after %.1fs", time.time() - start)
+            return None
+    else:
+        response = client.chat.completions.create(**kwargs)
+        _record_usage(usage, response.usage)
+        raw_text = response.choices[0].message.content
+    return _log_response(raw_text, start)
+
+
+async def _acomplete(client, model, messages, response_format=None, stream=False,
+                     keep_alive=None, usage=None):
+    """Async version of _complete."""
+    start = time.time()
+    kwargs = _completion_kwargs(model, messages, response_format, keep_alive)
+    if stream:
+        raw_text = await _astream_completion(client, kwargs, usage)
+        if raw_text is None:
+            logger.info("LLM stream aborted after %.1fs", time.time() - start)
+            return None
+    else:
+        response = await client.chat.completions.create(**kwargs)
+        _record_usage(usage, response.usage)
+        raw_text = response.choices[0].message.content
+    return _log_response(raw_text, start)
+
+
+def _record_usage(usage, reported):
+    if usage is None or reported is None:
+        return
+    usage["prompt_tokens"] = reported.prompt_tokens
+    usage["completion_tokens"] = reported.completion_tokens
+
+
+def _log_response(raw_text, start):
     elapsed = time.time() - start
     logger.info("LLM response received in %.1fs", elapsed)
 
-    raw_text = response.choices[0].message.content.strip()
+    raw_text = raw_text.strip()
     logger.info("Response length: %d chars", len(raw_text))
     logger.info("=== LLM Raw Response ===")
     logger.info(raw_text)
     logger.info("========================")
+    return raw_text
 
-    # Strip markdown code fences if present
-    if raw_text.startswith("```"):
-        raw_text = raw_text.split("\n", 1)[1]
-        raw_text = raw_text.rsplit("```", 1)[0].strip()
 
-    try:
-        result = json.loads(raw_text)
-    except json.JSONDecodeError:
-        logger.warning("Failed to parse LLM response as JSON")
+def _parse(raw_text):
+    """Parse a response as a JSON object, repairing near-misses locally.
+
+    Returns None if there is no response or nothing can be recovered.
+    """
+    if raw_text is None:
         return None
+    with span("llm.parse", chars=len(raw_text)) as fields:
+        try:
+            result = loads_lenient(raw_text)
+        except ValueError as e:
+            fields["failed"] = True
+            logger.warning("Failed to parse LLM response as JSON: %s", e)
+            return None
 
     logger.info("=== Parsed LLM Result ===")
     logger.info(json.dumps(result, indent=2))
     logger.info("=========================")
+    return result
 
-    # Validate expected structure
-    if "title" not in result or "summary" not in result:
-        return None
-    if "ideas" not in result or not isinstance(result["ideas"], list):
-        return None
-    if len(result["ideas"]) != 5:
-        return None
 
-    # Normalize ideas: if LLM returns dicts, extract the string value
+def _check_fields(result, final=False):
+    """Validate each report field independently.
+
+    On the `final` attempt an overlong title is shortened rather than
+    reported as a problem, since there is no further attempt to fix it.
+
+    Returns:
+        Tuple of (report, problems). report holds every usable field, with
+        ideas normalized to plain strings (a short but otherwise valid ideas
+        list is kept so the follow-up only has to supply the rest). problems
+        maps each field still needing regeneration to a short reason.
+    """
+    report = {}
+    problems = {}
+
+    title = result.get("title")
+    if not isinstance(title, str) or not title.strip():
+        problems["title"] = "missing"
+    elif len(title.strip()) > MAX_TITLE_LENGTH:
+        if final:
+            report["title"] = _shorten_title(title.strip())
+        else:
+            problems["title"] = "too long"
+    else:
+        report["title"] = title.strip()
+
+    summary = result.get("summary")
+    if not isinstance(summary, str) or not summary.strip():
+        problems["summary"] = "missing"
+    else:
+        report["summary"] = summary
+
+    ideas = result.get("ideas")
+    if not isinstance(ideas, list) or not ideas:
+        problems["ideas"] = "missing"
+    else:
+        ideas = _normalize_ideas(fit_ideas(ideas, IDEA_COUNT))
+        report["ideas"] = ideas
+        if len(ideas) != IDEA_COUNT:
+            problems["ideas"] = f"{len(ideas)} of {IDEA_COUNT}"
+
+    return report, problems
+
+
+def _shorten_title(title):
+    """Cut a title to MAX_TITLE_LENGTH at a word boundary, adding an ellipsis."""
+    cut = title[:MAX_TITLE_LENGTH - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:-") + "…"
+
+
+def _normalize_ideas(ideas):
+    """Normalize ideas: if LLM returns dicts, extract the string value."""
     normalized_ideas = []
-    for idea in result["ideas"]:
+    for idea in ideas:
         if isinstance(idea, dict):
             # Try common keys: name, description, idea, title
             val = (
@@ -171,6 +614,141 @@ def _call_and_parse(client, model, messages):
             normalized_ideas.append(val)
         else:
             normalized_ideas.append(str(idea))
-    result["ideas"] = normalized_ideas
+    return [idea for idea in normalized_ideas if idea.strip()]
 
-    return result
+
+def _missing_ideas(report):
+    """How many ideas a follow-up must supply."""
+    return IDEA_COUNT - len(report.get("ideas", []))
+
+
+def _followup_prompt(report, problems):
+    """A short request for only the fields that need regenerating."""
+    lines = ["Part of your previous response needs fixing."]
+    if "title" in problems:
+        lines.append(
+            f'- "title": a catchy, concise title under {MAX_TITLE_LENGTH} characters.'
+        )
+    if "summary" in problems:
+        lines.append('- "summary": the 2-4 paragraph summary described above.')
+    if "ideas" in problems:
+        missing = _missing_ideas(report)
+        if report.get("ideas"):
+            lines.append(
+                f'- "ideas": an array of exactly {missing} more project idea '
+                "strings, different from the ones you already gave."
+            )
+        else:
+            lines.append(
+                f'- "ideas": an array of exactly {IDEA_COUNT} plain-string project ideas.'
+            )
+    keys = ", ".join(f'"{field}"' for field in problems)
+    lines.append(f"Output ONLY a JSON object with keys: {keys}.")
+    return "\n".join(lines)
+
+
+def _followup_schema(report, problems):
+    """REPORT_SCHEMA narrowed to the fields requested in a follow-up."""
+    properties = {field: dict(REPORT_SCHEMA["properties"][field]) for field in problems}
+    if "ideas" in properties:
+        missing = _missing_ideas(report)
+        properties["ideas"]["minItems"] = missing
+        properties["ideas"]["maxItems"] = missing
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(problems),
+        "additionalProperties": False,
+    }
+
+
+def _merge_fix(report, fix, problems):
+    """Combine the valid fields of the first response with a follow-up."""
+    merged = dict(report)
+    for field in problems:
+        if field not in fix:
+            continue
+        if field == "ideas" and report.get("ideas") and isinstance(fix["ideas"], list):
+            merged["ideas"] = report["ideas"] + fix["ideas"]
+        else:
+            merged[field] = fix[field]
+    return merged
+
+
+def _stream_completion(client, kwargs, usage=None):
+    """Stream a completion, validating the JSON as tokens arrive.
+
+    Once the object is complete, up to MAX_TRAILING_CHUNKS further chunks
+    are drained so the server's final usage chunk can still be recorded.
+
+    Returns:
+        The response text, or None if the stream was cancelled because the
+        output became provably malformed.
+    """
+    validator = JsonStreamValidator()
+    chunks = []
+    trailing = 0
+    response = client.chat.completions.create(
+        **kwargs, stream=True, stream_options={"include_usage": True}
+    )
+    try:
+        for chunk in response:
+            _record_usage(usage, chunk.usage)
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if validator.complete:
+                # Anything after the closing brace is discarded anyway
+                trailing += 1
+                if trailing > MAX_TRAILING_CHUNKS:
+                    break
+                continue
+            delta = chunk.choices[0].delta.content
+            chunks.append(delta)
+            validator.feed(delta)
+    except MalformedJSON as e:
+        logger.warning(
+            "Cancelling malformed LLM stream after %d chars: %s",
+            sum(len(c) for c in chunks), e,
+        )
+        logger.info("Partial response: %s", "".join(chunks))
+        return None
+    finally:
+        response.close()
+
+    text = "".join(chunks)
+    return text[:validator.consumed] if validator.complete else text
+
+
+async def _astream_completion(client, kwargs, usage=None):
+    """Async version of _stream_completion."""
+    validator = JsonStreamValidator()
+    chunks = []
+    trailing = 0
+    response = await client.chat.completions.create(
+        **kwargs, stream=True, stream_options={"include_usage": True}
+    )
+    try:
+        async for chunk in response:
+            _record_usage(usage, chunk.usage)
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if validator.complete:
+                trailing += 1
+                if trailing > MAX_TRAILING_CHUNKS:
+                    break
+                continue
+            delta = chunk.choices[0].delta.content
+            chunks.append(delta)
+            validator.feed(delta)
+    except MalformedJSON as e:
+        logger.warning(
+            "Cancelling malformed LLM stream after %d chars: %s",
+            sum(len(c) for c in chunks), e,
+        )
+        logger.info("Partial response: %s", "".join(chunks))
+        return None
+    finally:
+        await response.close()
+
+    text = "".join(chunks)
+    return text[:validator.consumed] if validator.complete else text
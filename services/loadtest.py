@@ -0,0 +1,180 @@
+import http.client
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each route in the generated traffic
+ROUTE_WEIGHTS = {"index": 5, "post": 4, "about": 1}
+
+
+class LoadResult:
+    """Latencies and errors collected by run_load, grouped by route."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # route -> [ms]
+        self.errors = defaultdict(int)
+        self.elapsed = 0.0
+
+    @property
+    def requests(self):
+        return sum(len(v) for v in self.latencies.values()) + sum(self.errors.values())
+
+    @property
+    def throughput(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, latencies, errors):
+        for route, values in latencies.items():
+            self.latencies[route].extend(values)
+        for route, count in errors.items():
+            self.errors[route] += count
+
+    def summary(self):
+        """Format per-route latency percentiles as a table."""
+        header = (f"{'route':<8} {'requests':>9} {'errors':>7} {'p50 ms':>8} "
+                  f"{'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        lines = [header, "-" * len(header)]
+        routes = [r for r in ROUTE_WEIGHTS if r in self.latencies or r in self.errors]
+        everything = [ms for route in routes for ms in self.latencies[route]]
+        for route, values in [(r, self.latencies[r]) for r in routes] + [("all", everything)]:
+            errors = sum(self.errors.values()) if route == "all" else self.errors[route]
+            if route == "all":
+                lines.append("-" * len(header))
+            if values:
+                stats = [percentile(values, p) for p in (50, 95, 99)] + [max(values)]
+                cells = "".join(f" {v:>8.1f}" for v in stats)
+            else:
+                cells = "".join(f" {'-':>8}" for _ in range(4))
+            lines.append(f"{route:<8} {len(values) + errors:>9} {errors:>7}{cells}")
+        return "\n".join(lines)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def wait_until_ready(host, port, path="/about", timeout=30.0):
+    """Poll a server until `path` answers 200.
+
+    Raises:
+        RuntimeError: If the server is not ready within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            conn.request("GET", path)
+            if conn.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {host}:{port} not ready after {timeout:.0f}s")
+
+
+def run_load(host, port, post_ids, concurrency, duration, seed=0):
+    """Drive the site's routes from `concurrency` client threads.
+
+    Each client keeps one HTTP connection (reconnecting when the server
+    closes it) and issues requests back to back for `duration` seconds,
+    picking routes by ROUTE_WEIGHTS and posts uniformly from `post_ids`.
+
+    Returns:
+        A LoadResult.
+    """
+    result = LoadResult()
+    lock = threading.Lock()
+    routes = list(ROUTE_WEIGHTS)
+    weights = [ROUTE_WEIGHTS[r] for r in routes]
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(index):
+        rng = random.Random(seed + index)
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            if route == "index":
+                path = "/"
+            elif route == "post":
+                path = f"/post/{rng.choice(post_ids)}"
+            else:
+                path = "/about"
+
+            sent = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+            if ok:
+                latencies[route].append((time.perf_counter() - sent) * 1000)
+            else:
+                errors[route] += 1
+        conn.close()
+        with lock:
+            result.merge(latencies, errors)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def child_pids(pid):
+    """Return the pids of a process's direct children.
+
+    Reads Linux /proc; returns [] where it does not exist (e.g. macOS).
+    """
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return []
+    children = []
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # The command name may contain spaces; ppid follows the ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(name))
+    return sorted(children)
+
+
+def process_memory(pid):
+    """Return (rss_kib, peak_rss_kib) of a process from /proc, or None."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        return None
+    if "VmRSS" not in values:
+        return None
+    return values["VmRSS"], values.get("VmHWM", values["VmRSS"])
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from services.file_store import BoundedFileStore
+
+logger = logging.getLogger(__name__)
+
+
+class FilePageStore(BoundedFileStore):
+    """Size-bounded directory of rendered pages shared between processes.
+
+    Every gunicorn worker (and every dyno sharing the directory) can serve
+    a page rendered by any other. Writes are atomic; pruning runs on a
+    background thread once a tenth of `max_bytes` has been written, so a
+    request that renders a page never waits on a directory scan.
+    """
+
+    SUFFIX = ".html"
+
+    def __init__(self, directory, max_bytes):
+        super().__init__(
+            directory, max_bytes, prune_slack=max_bytes // 10, background_prune=True
+        )
+
+    def get(self, key):
+        return self.read(key)
+
+    def put(self, key, body):
+        self.write(key, body)
+
+
+class PageCache:
+    """In-process LRU of rendered pages, optionally backed by a shared store.
+
+    Lookups try the LRU first, then the store; pages found in the store are
+    promoted into the LRU. Keys should include everything the page depends
+    on besides its content (e.g. a template fingerprint), since pages are
+    never revalidated.
+
+    Args:
+        max_entries: Pages kept in memory; 0 disables the in-process LRU.
+        store: Optional FilePageStore (or anything with get/put by key).
+    """
+
+    def __init__(self, max_entries, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the rendered body for `key`, or None on a miss."""
+        with self._lock:
+            body = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+                return body
+
+        if self.store is None:
+            return None
+        try:
+            body = self.store.get(key)
+        except OSError as e:
+            logger.warning("Page store read failed for %s: %s", key, e)
+            return None
+        if body is not None:
+            self._remember(key, body)
+        return body
+
+    def put(self, key, body):
+        """Cache a rendered body (bytes)."""
+        self._remember(key, body)
+        if self.store is not None:
+            try:
+                self.store.put(key, body)
+            except OSError as e:
+                logger.warning("Page store write failed for %s: %s", key, e)
+
+    def _remember(self, key, body):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._pages[key] = body
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+
+def template_fingerprint(app, *names):
+    """Short hash of template sources, for keys that must change on deploy."""
+    digest = hashlib.sha256()
+    for name in names:
+        source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        digest.update(source.encode("utf-8"))
+    return digest.hexdigest()[:12]
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+
+from services.huggingface import (
+    TRUNCATION_MARKER,
+    fetch_readme,
+    fetch_trending_candidates,
+    fetch_trending_items,
+)
+from services.llm import DEFAULT_TIMEOUT, agenerate_report, awarm_up
+
+logger = logging.getLogger(__name__)
+
+# Candidates whose READMEs are downloaded in parallel by run_one
+DEFAULT_PREFETCH = 3
+
+
+class GenerationPipeline:
+    """Asyncio pipeline from trending selection to saved reports.
+
+    Each selected item moves through README download and LLM generation on
+    its own, so several items are in flight at once: READMEs download while
+    earlier items are already generating, and at most `concurrency` LLM
+    requests run at a time. The pipeline holds no Flask state, so it can be
+    driven by the CLI or embedded in a long-running worker.
+
+    huggingface_hub and the database drivers are blocking, so HF requests
+    and the `filter_used` / `save` callables run in worker threads via
+    asyncio.to_thread. Context variables (including Flask's app context)
+    are copied into those threads.
+
+    Args:
+        llm_settings: Keyword arguments for agenerate_report (ollama_url,
+            api_key, model, ...).
+        token: Optional HuggingFace API token.
+        readme_cache: Optional ReadmeCache for README downloads.
+        filter_used: Optional callable returning the already used item names
+            from a list of candidates.
+        save: Optional callable taking a list of (metadata, report, metrics)
+            tuples, in trending order, to persist them.
+        concurrency: Maximum concurrent LLM requests.
+        warm_up: Load the model while items are being selected.
+    """
+
+    def __init__(self, llm_settings, token=None, readme_cache=None, filter_used=None,
+                 save=None, concurrency=2, warm_up=True):
+        self.llm_settings = llm_settings
+        self.token = token
+        self.readme_cache = readme_cache
+        self.filter_used = filter_used
+        self.save = save
+        self.concurrency = concurrency
+        self.warm_up = warm_up
+        self._semaphore = None
+
+    async def run(self, count):
+        """Select up to `count` unused trending items and generate their reports.
+
+        Items whose generation fails are logged and skipped.
+
+        Returns:
+            List of (metadata, report, metrics) tuples in trending order;
+            see generate for the metrics.
+
+        Raises:
+            RuntimeError: If no items are available or no report succeeds.
+        """
+        started = time.perf_counter()
+        warm_up = asyncio.create_task(self._warm_up())
+        try:
+            items = await asyncio.to_thread(
+                fetch_trending_items, count, token=self.token, filter_used=self.filter_used
+            )
+        except BaseException:
+            warm_up.cancel()
+            raise
+        if not items:
+            warm_up.cancel()
+            raise RuntimeError("No unused trending items found.")
+        logger.info("Selected %d of %d requested items", len(items), count)
+
+        outcomes = await asyncio.gather(
+            *(self.generate(metadata, ready=warm_up, started=started) for metadata in items),
+            return_exceptions=True,
+        )
+
+        results = []
+        for metadata, outcome in zip(items, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("Failed to generate %s: %s", metadata["id"], outcome)
+            else:
+                results.append((metadata, *outcome))
+        if not results:
+            raise RuntimeError("No reports could be generated.")
+
+        if self.save is not None:
+            await asyncio.to_thread(self.save, results)
+        return results
+
+    async def run_one(self, prefetch=DEFAULT_PREFETCH):
+        """Generate a report for one unused trending item.
+
+        The warm-up starts immediately and READMEs for up to `prefetch`
+        equally ranked candidates download in parallel, so the LLM request
+        waits on the slower of HF and the warm-up instead of their sum. The
+        first candidate whose README arrives is used (or the first candidate
+        if none has one); the other downloads still fill the README cache.
+
+        Returns:
+            A (metadata, report, metrics) tuple; see generate for the metrics.
+
+        Raises:
+            RuntimeError: If no unused trending items can be found.
+        """
+        started = time.perf_counter()
+        warm_up = asyncio.create_task(self._warm_up())
+        try:
+            # At least one candidate is needed to report on at all
+            candidates = await asyncio.to_thread(
+                fetch_trending_candidates, max(prefetch, 1),
+                token=self.token, filter_used=self.filter_used,
+            )
+            metadata = await self._first_with_readme(candidates)
+        except BaseException:
+            warm_up.cancel()
+            raise
+
+        report, metrics = await self._report(metadata, ready=warm_up, started=started)
+        if self.save is not None:
+            await asyncio.to_thread(self.save, [(metadata, report, metrics)])
+        return metadata, report, metrics
+
+    async def generate(self, metadata, ready=None, started=None):
+        """Fetch the README for one item and generate its report.
+
+        Args:
+            metadata: Item metadata from the trending listing; the README is
+                added under "readme" when available.
+            ready: Optional awaitable (e.g. the warm-up) to wait for before
+                the LLM request.
+            started: perf_counter() value the job duration is measured
+                from; defaults to now.
+
+        Returns:
+            Tuple of (report, metrics). The report is a dict with keys
+            title, summary, ideas. metrics is a dict with the model, the
+            generate_report stats, readme_chars, readme_truncated and job_ms.
+        """
+        if started is None:
+            started = time.perf_counter()
+        await self._fetch_readme(metadata)
+        return await self._report(metadata, ready=ready, started=started)
+
+    async def _fetch_readme(self, metadata):
+        readme = await asyncio.to_thread(
+            fetch_readme, metadata["id"], metadata["type"],
+            token=self.token, cache=self.readme_cache,
+        )
+        if readme:
+            metadata["readme"] = readme
+        return readme
+
+    async def _first_with_readme(self, candidates):
+        """Prefetch READMEs for all candidates; return the first that has one."""
+        pending = {
+            asyncio.create_task(self._fetch_readme(metadata)): metadata
+            for metadata in candidates
+        }
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                metadata = pending.pop(task)
+                if task.result():
+                    return metadata
+        return candidates[0]
+
+    async def _report(self, metadata, ready, started):
+        if ready is not None:
+            await asyncio.shield(ready)
+        metrics = {"model": self.llm_settings["model"]}
+        async with self._llm_slots():
+            report = await agenerate_report(
+                metadata=metadata, stats=metrics, **self.llm_settings
+            )
+        logger.info("Generated: %s (%s)", report["title"], metadata["id"])
+
+        readme = metadata.get("readme")
+        metrics["readme_chars"] = len(readme) if readme else None
+        metrics["readme_truncated"] = bool(readme) and readme.endswith(TRUNCATION_MARKER)
+        metrics["job_ms"] = round((time.perf_counter() - started) * 1000)
+        return report, metrics
+
+    def _llm_slots(self):
+        # Created lazily so the semaphore binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _warm_up(self):
+        if not self.warm_up:
+            return
+        settings = self.llm_settings
+        await awarm_up(
+            ollama_url=settings["ollama_url"],
+            api_key=settings["api_key"],
+            model=settings["model"],
+            keep_alive=settings.get("keep_alive"),
+            timeout=settings.get("timeout", DEFAULT_TIMEOUT),
+        )
@@ -0,0 +1,26 @@
+from services.file_store import BoundedFileStore
+
+
+class ReadmeCache(BoundedFileStore):
+    """Size-bounded on-disk cache of README contents.
+
+    Entries are content-addressed by (repo_type, repo_id, commit sha), so a
+    cached README is valid for as long as the repo's revision is unchanged
+    and never needs revalidating beyond resolving the current commit.
+    Reads refresh an entry's mtime, and writes evict the least recently
+    used entries once the cache grows past `max_bytes`.
+    """
+
+    SUFFIX = ".md"
+
+    def _key(self, repo_type, repo_id, revision):
+        return f"{repo_type}:{repo_id}@{revision}"
+
+    def get(self, repo_type, repo_id, revision):
+        """Return the cached README for this revision, or None on a miss."""
+        data = self.read(self._key(repo_type, repo_id, revision))
+        return None if data is None else data.decode("utf-8")
+
+    def put(self, repo_type, repo_id, revision, content):
+        """Store a README for this revision, then enforce the size bound."""
+        self.write(self._key(repo_type, repo_id, revision), content.encode("utf-8"))
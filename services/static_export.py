@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+
+from services.file_store import write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class StaticSite:
+    """Output directory of an incremental static export.
+
+    A manifest next to the pages records the version each file was last
+    written for (a template fingerprint, a report generation, a content
+    hash), so a re-export only rewrites files whose version changed and
+    removes files the site no longer has. Writes are atomic, so a web
+    server reading the directory never sees a partial page.
+
+    Args:
+        directory: Root of the exported site.
+        force: Ignore the manifest and rewrite every file.
+    """
+
+    MANIFEST = ".export-manifest.json"
+
+    def __init__(self, directory, force=False):
+        self.directory = directory
+        self._previous = {} if force else self._load_manifest()
+        self._current = {}
+        self.written = 0
+        self.skipped = 0
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, self.MANIFEST), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable export manifest: %s", e)
+            return {}
+
+    def is_current(self, path, version):
+        """Return True if `path` was already written for `version`.
+
+        Either way the path is kept in the site; callers skip rendering
+        when this returns True.
+        """
+        self._current[path] = version
+        current = (
+            self._previous.get(path) == version
+            and os.path.exists(os.path.join(self.directory, path))
+        )
+        if current:
+            self.skipped += 1
+        return current
+
+    def write(self, path, body, version):
+        """Atomically write `body` (bytes) to `path` and record its version."""
+        self._write_file(path, body)
+        self._current[path] = version
+        self.written += 1
+
+    def _write_file(self, path, body):
+        # mkstemp creates 0600 files; the web server needs to read them
+        write_atomic(os.path.join(self.directory, path), body, mode=0o644)
+
+    def finish(self):
+        """Remove files earlier exports wrote but this one did not keep.
+
+        Saves the manifest for the next export.
+
+        Returns:
+            The number of files removed.
+        """
+        removed = 0
+        for path in set(self._previous) - set(self._current):
+            try:
+                os.unlink(os.path.join(self.directory, path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        body = json.dumps(self._current, indent=1, sort_keys=True).encode("utf-8")
+        self._write_file(self.MANIFEST, body)
+        return removed
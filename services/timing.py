@@ -0,0 +1,95 @@
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_collector = contextvars.ContextVar("timing_collector", default=None)
+
+
+class SpanCollector:
+    """Records every span finished while it is active.
+
+    The collector is held in a context variable, so spans from asyncio tasks
+    and from worker threads started with a copied context (asyncio.to_thread,
+    or copy_context().run in an executor) land in the same collector.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.records = []
+
+    def summary(self):
+        """Format the recorded spans as a table, one row per span name.
+
+        Rows are in order of first start. Time is summed over all spans of
+        that name, so concurrent spans can add up to more than the wall time.
+        """
+        rows = {}
+        for record in sorted(self.records, key=lambda r: r["start_ms"]):
+            row = rows.setdefault(record["span"], [0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += record["ms"]
+            row[2] = max(row[2], record["ms"])
+
+        width = max([len(name) for name in rows] + [len("stage")])
+        lines = [
+            f"{'stage':<{width}}  {'count':>5}  {'total ms':>10}  {'max ms':>10}",
+            "-" * (width + 33),
+        ]
+        for name, (count, total, longest) in rows.items():
+            lines.append(f"{name:<{width}}  {count:>5}  {total:>10.1f}  {longest:>10.1f}")
+        lines.append("-" * (width + 33))
+        wall = (time.perf_counter() - self.start) * 1000
+        lines.append(f"{'wall time':<{width}}  {'':>5}  {wall:>10.1f}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def collect():
+    """Collect the spans finished inside the block.
+
+    Yields:
+        A SpanCollector holding the records.
+    """
+    collector = SpanCollector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def span(name, **fields):
+    """Time a stage and log it as a single JSON line.
+
+    Fields are included in the log record; the yielded dict can be updated
+    inside the block to add fields only known at the end (sizes, cache
+    hits). On exit the duration is stored in it under "ms". Failed stages
+    are logged with the exception type.
+
+    Yields:
+        The mutable dict of fields.
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        fields["ms"] = round((end - start) * 1000, 1)
+        record = {"span": name, "ms": fields["ms"], **fields}
+        if error:
+            record["error"] = error
+
+        collector = _collector.get()
+        if collector is not None:
+            record["start_ms"] = round((start - collector.start) * 1000, 1)
+            collector.records.append(record)
+        logger.info(json.dumps(record, default=str))